@@ -34,6 +34,12 @@ TEST_COMMANDS = [
     ("show me script.js", "display_file", ["script.js"]),
 
     ("show file.py", "display_file", ["file.py"]),
+
+    # A direct command with one plain word uses that word as its argument, as a shell would.
+    ("rm *.tmp", "delete_file", ["*.tmp"]),
+    ("cat file", "display_file", ["file"]),
+    ("cd it", "change_directory", ["it"]),
+    ("cp file", "error", None),  # error results carry a message instead of args
 ]
 
 @pytest.mark.parametrize("input_text, expected_action, expected_args", TEST_COMMANDS)
@@ -53,3 +59,7 @@ def test_parse_input(input_text, expected_action, expected_args):
         assert result.get('args') == expected_args, \
             f"For input '{input_text}', expected args {expected_args} but got {result.get('args')}"
 
+
+def test_direct_copy_without_destination():
+    result = parse_input("cp file")
+    assert result == {'action': 'error', 'message': 'Missing destination for copy_file'}
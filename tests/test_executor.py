@@ -0,0 +1,77 @@
+"""
+File: test_executor.py
+Description: Contains tests for running parsed commands through the shell, checking that
+             every command's output, errors and exit code are reported.
+"""
+
+import shutil
+import sys
+import pytest
+from command_executor.executor import execute_commands, _run_shell
+
+pytestmark = pytest.mark.skipif(sys.platform == 'win32', reason="uses POSIX shell commands")
+
+
+@pytest.fixture
+def run_combined(tmp_path, monkeypatch, capsys):
+    """Run a callable in an empty directory; returns its result and its stdout and stderr as one
+    stream, so the order of output and error reports can be checked."""
+    monkeypatch.chdir(tmp_path)
+
+    def run(action):
+        # capsys only swaps the streams in once the test is running, so redirect here.
+        monkeypatch.setattr(sys, 'stderr', sys.stdout)
+        result = action()
+        return result, capsys.readouterr().out
+    return run
+
+
+def test_batch_reports_each_failing_command(run_combined):
+    _, output = run_combined(lambda: execute_commands([
+        {'action': 'delete_file', 'args': ['nothere.txt']},
+        {'action': 'make_directory', 'args': ['newdir']},
+        {'action': 'list_files', 'args': []},
+        {'action': 'display_file', 'args': ['missing.txt']},
+        {'action': 'create_file', 'args': ['a.txt']},
+    ]))
+
+    assert output.count("⚠️ Command finished with exit code: 1") == 2
+    # Each command's errors are reported right after it, before the next one's output.
+    assert output.index("nothere.txt") < output.index("exit code: 1") < output.index("newdir")
+    assert output.index("newdir") < output.index("missing.txt")
+
+
+def test_errors_and_exit_codes_stay_off_stdout(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    execute_commands([
+        {'action': 'display_file', 'args': ['missing.txt']},
+        {'action': 'make_directory', 'args': ['newdir']},
+        {'action': 'list_files', 'args': []},
+    ])
+    captured = capsys.readouterr()
+
+    assert captured.out == "newdir\n"
+    assert "missing.txt" in captured.err
+    assert "⚠️ Command finished with exit code: 1" in captured.err
+
+
+needs_bash = pytest.mark.skipif(shutil.which('bash') is None, reason="the warm shell needs bash")
+
+
+@needs_bash
+def test_warm_shell_reports_output_errors_and_status(run_combined):
+    statuses, output = run_combined(lambda: [_run_shell("printf 'no newline'; echo oops >&2; exit 3"),
+                                             _run_shell("echo next")])
+
+    assert statuses == [3, 0]
+
+    assert output == "no newline\noops\n⚠️ Command finished with exit code: 3\nnext\n"
+
+
+@needs_bash
+def test_warm_shell_hides_its_wrapper_when_a_command_is_killed(run_combined):
+    status, output = run_combined(lambda: _run_shell("kill -9 $BASHPID"))
+
+    assert status == 137
+
+    assert output == "Killed\n⚠️ Command finished with exit code: 137\n"
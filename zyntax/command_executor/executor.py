@@ -6,9 +6,82 @@ Handles cross-platform compatibility for Linux, macOS, and Windows.
 import subprocess
 import platform
 import os
-import psutil
+import getpass
+import queue
+import re
+import secrets
 import shlex
+import shutil
+import signal
 import sys
+import threading
+import time
+from types import MappingProxyType
+
+# Resolved once at import from sys.platform (a constant string); platform.system() may
+# shell out to `uname`, so it is only consulted for unrecognised platforms.
+# ZYNTAX_OS_OVERRIDE lets tests exercise another platform's command mapping.
+_SYS_PLATFORM_NAMES = {'linux': 'Linux', 'darwin': 'Darwin', 'win32': 'Windows'}
+_OS_NAME = (os.environ.get("ZYNTAX_OS_OVERRIDE")
+            or _SYS_PLATFORM_NAMES.get(sys.platform.split('-')[0])
+            or platform.system())
+
+# psutil.virtual_memory() re-reads /proc/meminfo (or makes a syscall) on every call;
+# samples younger than ZYNTAX_MEM_MIN_INTERVAL seconds are reused instead.
+try:
+    _MEM_MIN_INTERVAL = float(os.environ.get("ZYNTAX_MEM_MIN_INTERVAL", "0.5"))
+except ValueError:
+    _MEM_MIN_INTERVAL = 0.5
+_MEM_CACHE = {'t': 0.0, 'v': None}
+
+# Echo lines ("Executing: ...") and the Output/Errors banners are only worth building
+# for a person at a terminal; scripts and tests get the bare command output.
+_VERBOSE = os.environ.get('ZYNTAX_VERBOSE', '1') != '0' and sys.stdout.isatty()
+
+# Error messages go to stderr, away from command output. They are stored UTF-8
+# encoded so the common case writes bytes straight to the stream with no per-call
+# encode of the template; _write_error() decodes again for non-UTF-8 streams.
+_ERR_DIR_NOT_FOUND = '❌ Error: Directory not found: %s\n'.encode()
+_ERR_CHDIR = '❌ Error changing directory to %s: %s\n'.encode()
+_ERR_CHDIR_HOME = '❌ Error changing to home directory: %s\n'.encode()
+_ERR_CREATE_FILE = "Error creating file '%s' with Python: %s\n".encode()
+_ERR_CREATE_FILE_NO_NAME = 'Error: Filename needed for create_file on Windows\n'.encode()
+_ERR_NO_PSUTIL = '❌ Error: psutil library not found. Please install it: pip install psutil\n'.encode()
+_ERR_PSUTIL = '❌ Error getting memory info via psutil: %s\n'.encode()
+_ERR_PIPE_UNMAPPABLE = "❌ Error: Piped segment '%s' unmappable.\n".encode()
+_ERR_PIPE_PYTHON_ACTION = "❌ Error: Python-internal action '%s' cannot be part of a shell pipe string.\n".encode()
+_ERR_PIPE_UNSUPPORTED = "❌ Error: %s is not supported directly on this OS's command line.\n".encode()
+_ERR_PIPE_SEGMENT = '❌ Error: Could not form command parts for pipe segment: %s\n'.encode()
+_ERR_BATCH = '❌ An unexpected error during batch execution: %s\n'.encode()
+_ERR_EMPTY_PARSE = '❓ Parser returned an unexpected result (None or empty).\n'.encode()
+_ERR_EMPTY_RAW = '❌ Error: Raw shell string command is empty.\n'.encode()
+_ERR_RAW_SHELL = '❌ An unexpected error occurred during raw shell string execution: %s\n'.encode()
+_ERR_RAW_COMMAND = '❌ An unexpected error occurred during single raw_command execution: %s\n'.encode()
+_ERR_PIPE = '❌ An unexpected error during piped execution: %s\n'.encode()
+_ERR_NO_ACTION = '❓ Error: No action specified in parsed command: %s\n'.encode()
+_ERR_UNMAPPED_ACTION = "❓ Command action '%s' could not be executed (get_platform_command returned None).\n".encode()
+_ERR_UNSUPPORTED = "❌ Error: Action '%s' is not directly supported on this OS's command line via Zyntax yet.\n".encode()
+_ERR_UNKNOWN_MARKER = "❌ Internal Error: Unrecognized Python-handled action string '%s'\n".encode()
+_ERR_NOT_A_LIST = "❌ Internal Error: Expected command_list to be a list, got %s for action '%s'\n".encode()
+_ERR_NOT_FOUND = "❌ Error: Command '%s' not found.\n".encode()
+_ERR_UNEXPECTED = '❌ An unexpected error occurred: %s\n'.encode()
+# A command's own stderr and its exit status are reported on stderr as well.
+_ERR_COMMAND_STDERR = '%s\n'.encode()
+_ERR_COMMAND_STDERR_VERBOSE = '--- Errors ---\n%s\n--------------\n'.encode()
+_ERR_EXIT_CODE = '⚠️ Command finished with exit code: %s\n'.encode()
+_ERR_PIPE_CD = "Warning: 'cd' action in pipe segment ('%s'). This won't affect subsequent piped commands in this execution string.\n".encode()
+
+
+def _write_error(template, *values):
+    """Write a pre-encoded error template (bytes %-format) to stderr."""
+    message = template % tuple(str(value).encode('utf-8', 'replace') for value in values) if values else template
+    sys.stdout.flush()  # keep the error after any output already written
+    buffer = getattr(sys.stderr, 'buffer', None)
+    if buffer is not None and (getattr(sys.stderr, 'encoding', None) or '').lower().replace('-', '') == 'utf8':
+        sys.stderr.flush()
+        buffer.write(message); buffer.flush()
+    else:
+        sys.stderr.write(message.decode('utf-8')); sys.stderr.flush()
 
 # Windows built-in commands that require shell=True
 WINDOWS_SHELL_BUILTINS = {
@@ -19,7 +92,7 @@ WINDOWS_SHELL_BUILTINS = {
 
 def needs_shell_on_windows(command_list):
     """Check if a command needs shell=True on Windows."""
-    if platform.system() != 'Windows':
+    if _OS_NAME != 'Windows':
         return False
     if not command_list:
         return False
@@ -28,7 +101,7 @@ def needs_shell_on_windows(command_list):
     base_command = command_list[0].lower()
     return base_command in WINDOWS_SHELL_BUILTINS
 
-COMMAND_MAP = {
+_COMMAND_MAP_SPEC = {
     'list_files': {'Linux': ['ls'], 'Windows': ['dir']},
     'show_path': {'Linux': ['pwd'], 'Windows': ['cd']},  # On Windows, 'cd' without args shows current dir
     'change_directory': {'Linux': ['cd'], 'Windows': ['cd']},
@@ -59,52 +132,85 @@ COMMAND_MAP = {
     'env_variables': {'Linux': ['env'], 'Darwin': ['env'], 'Windows': ['set']},
 }
 
-def get_platform_command(action, args):
-    os_name = platform.system()
-    if action == 'memory_usage' and (os_name == 'Darwin' or not COMMAND_MAP['memory_usage'].get(os_name)):
+# Read-only view of the table above: keys are interned so lookups with the parser's
+# (also interned) action strings hit on identity, and per-OS entries become tuples.
+COMMAND_MAP = MappingProxyType({
+    sys.intern(_action): MappingProxyType({
+        _os: tuple(_cmd) if _cmd is not None else None for _os, _cmd in _mapping.items()
+    })
+    for _action, _mapping in _COMMAND_MAP_SPEC.items()
+})
+del _COMMAND_MAP_SPEC
+
+def _resolve_base_command(action, mapping, os_name):
+    """Apply the OS -> Linux (for Darwin) -> default fallback for one COMMAND_MAP entry."""
+    base_cmd_list = mapping.get(os_name)
+    if base_cmd_list is None and os_name == 'Darwin' and action != 'memory_usage':
+        base_cmd_list = mapping.get('Linux')
+    if base_cmd_list is None:
+        base_cmd_list = mapping.get('default')
+    return base_cmd_list
+
+# Base command per action for the running OS, resolved once so dispatch is a single lookup.
+# Stored as tuples: they are shared by every call and must never be mutated in place.
+_RESOLVED_CMDS = {}
+for _action, _mapping in COMMAND_MAP.items():
+    _base = _resolve_base_command(_action, _mapping, _OS_NAME)
+    _RESOLVED_CMDS[_action] = tuple(_base) if _base is not None else None
+del _action, _mapping, _base
+
+# Actions answered inside the Python process instead of by a subprocess.
+_PYTHON_HANDLED_ACTIONS = {'change_directory'}
+if _OS_NAME == 'Darwin' or not COMMAND_MAP['memory_usage'].get(_OS_NAME):
+    _PYTHON_HANDLED_ACTIONS.add('memory_usage')
+
+# Actions get_platform_command() maps to exactly base command + args, with no
+# per-call rewriting; pipes made only of these skip it entirely.
+_PASSTHROUGH_ACTIONS = frozenset(
+    action for action, base in _RESOLVED_CMDS.items() if base is not None
+) - {'display_file_head', 'display_file_tail', 'count_lines', 'delete_directory', 'create_file'} - _PYTHON_HANDLED_ACTIONS
+
+# Argument-less queries whose answer this process already has; a pipe still needs
+# the real command's output, so get_platform_command(in_pipe=True) skips these.
+_PYTHON_QUERY_ACTIONS = {'show_path': "PYTHON_SHOW_PATH", 'whoami': "PYTHON_WHOAMI"}
+
+def get_platform_command(action, args, in_pipe=False):
+    os_name = _OS_NAME
+    if not args and not in_pipe and action in _PYTHON_QUERY_ACTIONS:
+        return _PYTHON_QUERY_ACTIONS[action]
+    if action == 'memory_usage' and action in _PYTHON_HANDLED_ACTIONS:
         return "PYTHON_PSUTIL_MEM"
     elif action == 'change_directory':
         if args:
             target_dir = args[0]
+            expanded_target_dir = target_dir
             try:
                 expanded_target_dir = os.path.expanduser(target_dir)
                 os.chdir(expanded_target_dir)
                 return "PYTHON_HANDLED_CHDIR_SUCCESS"
             except FileNotFoundError:
-                error_path = expanded_target_dir if 'expanded_target_dir' in locals() else target_dir
-                print(f"❌ Error: Directory not found: {error_path}"); sys.stdout.flush()
+                _write_error(_ERR_DIR_NOT_FOUND, expanded_target_dir)
                 return "PYTHON_HANDLED_CHDIR_FAIL"
             except Exception as e:
-                error_path = expanded_target_dir if 'expanded_target_dir' in locals() else target_dir
-                print(f"❌ Error changing directory to {error_path}: {e}"); sys.stdout.flush()
+                _write_error(_ERR_CHDIR, expanded_target_dir, e)
                 return "PYTHON_HANDLED_CHDIR_FAIL"
         else:
             try:
                 os.chdir(os.path.expanduser("~"))
                 return "PYTHON_HANDLED_CHDIR_SUCCESS"
             except Exception as e:
-                print(f"❌ Error changing to home directory: {e}"); sys.stdout.flush()
+                _write_error(_ERR_CHDIR_HOME, e)
                 return "PYTHON_HANDLED_CHDIR_FAIL"
 
-    mapping = COMMAND_MAP.get(action)
-    base_cmd_list_orig = None
-    if mapping:
-        base_cmd_list_orig = mapping.get(os_name)
-        if base_cmd_list_orig is None and os_name == 'Darwin':
-            if action == 'network_interfaces':
-                 base_cmd_list_orig = mapping.get('Darwin')
-            elif action not in ['memory_usage']:
-                 base_cmd_list_orig = mapping.get('Linux')
-        if base_cmd_list_orig is None:
-            base_cmd_list_orig = mapping.get('default')
+    base_cmd_list_orig = _RESOLVED_CMDS.get(action)
 
     if base_cmd_list_orig is None:
         if action in ['display_file_head', 'display_file_tail', 'count_lines'] and os_name == 'Windows':
             return f"ACTION_UNSUPPORTED_ON_CMD:{action}"
         return None
 
-    base_cmd_list = list(base_cmd_list_orig)
-    final_args = list(args)
+    base_cmd_list = base_cmd_list_orig
+    final_args = args
 
     if action == 'create_file' and os_name == 'Windows':
          if args:
@@ -116,10 +222,10 @@ def get_platform_command(action, args):
                  print(f"Info: File '{filepath}' already exists."); sys.stdout.flush()
                  return "PYTHON_HANDLED_CREATE_FILE_EXISTS"
              except Exception as e:
-                 print(f"Error creating file '{filepath}' with Python: {e}"); sys.stdout.flush()
+                 _write_error(_ERR_CREATE_FILE, filepath, e)
                  return None
          else:
-              print("Error: Filename needed for create_file on Windows"); sys.stdout.flush()
+              _write_error(_ERR_CREATE_FILE_NO_NAME)
               return None
 
     if action in ['display_file_head', 'display_file_tail']:
@@ -148,6 +254,7 @@ def get_platform_command(action, args):
 
         # Construct command
         if num_lines_option_val:
+            base_cmd_list = list(base_cmd_list)
             # Ensure -n is not duplicated if already in base_cmd_list
             if '-n' not in base_cmd_list:
                  base_cmd_list.extend(['-n', num_lines_option_val])
@@ -171,7 +278,7 @@ def get_platform_command(action, args):
         has_recursive_flag = any(flag in base_cmd_list for flag in ['-r', '-rf']) or \
                              any(flag in final_args for flag in ['-r', '-rf'])
         if not has_recursive_flag:
-            base_cmd_list.append('-r')
+            base_cmd_list = [*base_cmd_list, '-r']
 
     if action == 'grep': # For direct grep, parser provides args in order
         pass # final_args should be correct from parser's shlex.split
@@ -184,119 +291,464 @@ def get_platform_command(action, args):
             # However, for wc, '-l' usually comes before filenames.
             # A simpler approach: COMMAND_MAP gives ['wc'], parser gives ['filename.txt']
             # We want ['wc', '-l', 'filename.txt']
-             base_cmd_list.append('-l') # Add -l to wc
+             base_cmd_list = [*base_cmd_list, '-l'] # Add -l to wc
 
-    full_cmd = base_cmd_list + final_args
+    full_cmd = [*base_cmd_list, *final_args]
     return full_cmd
 
 
+# Report banners, kept as constants so each section is one write() of a fixed template.
+_OUT_HEADER = "--- Output ---\n"
+_OUT_FOOTER = "--------------\n"
+_MEM_TPL = ("--- Memory Usage (psutil) ---\n  Total: {:.2f} GB\n  Available: {:.2f} GB\n"
+            "  Used: {:.2f} GB ({}%)\n-----------------------------\n")
+
+
+def _write_output_lines(lines):
+    """Write stdout lines as they arrive, framed by the verbose output banner."""
+    last_line = None
+    for line in lines:
+        if last_line is None and _VERBOSE: sys.stdout.write(_OUT_HEADER)
+        sys.stdout.write(line)
+        last_line = line
+    if last_line is not None:
+        if not last_line.endswith("\n"): sys.stdout.write("\n")
+        if _VERBOSE: sys.stdout.write(_OUT_FOOTER)
+    sys.stdout.flush()
+
+
+def _report_errors_and_status(stderr_text, returncode):
+    if stderr_text: _write_error(_ERR_COMMAND_STDERR_VERBOSE if _VERBOSE else _ERR_COMMAND_STDERR, stderr_text.strip())
+    if returncode != 0: _write_error(_ERR_EXIT_CODE, returncode)
+
+
+def _run_streamed(command, shell=False, executable=None):
+    """Run a command, writing its stdout as it arrives instead of buffering all of it.
+
+    stderr is drained on a helper thread so neither pipe can fill up and stall the
+    child, then reported once the command exits. Returns the exit code.
+    """
+    process = subprocess.Popen(command, shell=shell, executable=executable, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               text=True, errors='ignore', bufsize=1)
+    stderr_chunks = []
+    stderr_reader = threading.Thread(target=lambda: stderr_chunks.append(process.stderr.read()), daemon=True)
+    try:
+        stderr_reader.start()
+        _write_output_lines(process.stdout)
+        stderr_reader.join()
+        returncode = process.wait()
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+
+    _report_errors_and_status("".join(stderr_chunks), returncode)
+    return returncode
+
+
+# A long-lived `bash -s` that runs shell-string commands, so each one costs a
+# subshell fork instead of a fresh fork+exec of /bin/sh. Each command is eval'd in
+# a subshell (so `exit`, variables and `cd` don't leak into the next one) after
+# cd'ing to our cwd, then a marker carrying $? is printed on stdout and stderr.
+_WARM_SHELL = {'process': None, 'stderr_lines': None, 'stdin_redirect': None, 'unavailable': _OS_NAME == 'Windows'}
+_WARM_SHELL_MARKER = f"__ZYNTAX_DONE_{secrets.token_hex(8)}__"
+# bash prefixes its own messages with the line of its session script ("bash: line 12: "),
+# and reports a command killed by a signal as "<pid> Killed ( eval '...' ) 0<&3", which
+# shows our wrapper. Both are rewritten before the errors are reported.
+_BASH_LINE_PREFIX = re.compile(r"^bash: line \d+: ", re.MULTILINE)
+_BASH_JOB_STATUS_LINE = re.compile(r"^bash: line \d+: +\d+ .*$", re.MULTILINE)
+
+
+def _clean_warm_shell_errors(stderr_text, returncode):
+    """Strip the warm shell's wrapper details from a command's stderr."""
+    if returncode > 128 and _BASH_JOB_STATUS_LINE.search(stderr_text):
+        try: signal_name = signal.strsignal(returncode - 128) or ""
+        except ValueError: signal_name = ""
+        stderr_text = _BASH_JOB_STATUS_LINE.sub(lambda _: signal_name, stderr_text)
+    return _BASH_LINE_PREFIX.sub("bash: ", stderr_text)
+
+
+def _discard_warm_shell():
+    process = _WARM_SHELL['process']
+    _WARM_SHELL['process'] = None
+    if process is not None and process.poll() is None:
+        process.kill()
+        process.wait()
+
+
+def _get_warm_shell():
+    """Return the running warm shell, starting it if needed; None if unavailable."""
+    process = _WARM_SHELL['process']
+    if process is not None and process.poll() is None:
+        return process
+    if _WARM_SHELL['unavailable']:
+        return None
+    if shutil.which('bash') is None:
+        _WARM_SHELL['unavailable'] = True
+        return None
+
+    # The shell's own stdin carries our script, so hand commands a duplicate of
+    # our stdin under another descriptor number to keep them reading the terminal.
+    try: stdin_fd = os.dup(sys.stdin.fileno())
+    except (AttributeError, OSError, ValueError): stdin_fd = None
+    try:
+        process = subprocess.Popen(['bash', '-s'], stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, errors='ignore', bufsize=1,
+                                   pass_fds=(stdin_fd,) if stdin_fd is not None else ())
+    except OSError:
+        _WARM_SHELL['unavailable'] = True
+        return None
+    finally:
+        if stdin_fd is not None: os.close(stdin_fd)
+
+    stderr_lines = queue.Queue()
+    def pump_stderr():
+        for line in process.stderr: stderr_lines.put(line)
+        stderr_lines.put(None)
+    threading.Thread(target=pump_stderr, daemon=True).start()
+    _WARM_SHELL.update(process=process, stderr_lines=stderr_lines,
+                       stdin_redirect=f"<&{stdin_fd}" if stdin_fd is not None else "</dev/null")
+    return process
+
+
+def _collect_warm_shell_result(process):
+    """Report one command's output, errors and exit code from the warm shell; returns the code."""
+    marker = _WARM_SHELL_MARKER
+    status = []
+    def output_lines():
+        for line in iter(process.stdout.readline, ''):
+            marker_at = line.find(marker)
+            if marker_at == -1:
+                yield line
+                continue
+            if marker_at: yield line[:marker_at]
+            status.append(int(line[marker_at + len(marker):]))
+            return
+
+    _write_output_lines(output_lines())
+    if not status:
+        _discard_warm_shell()
+        raise ChildProcessError("the shell exited before the command finished")
+    stderr_parts = []
+    for line in iter(_WARM_SHELL['stderr_lines'].get, None):
+        marker_at = line.find(marker)
+        if marker_at != -1:
+            stderr_parts.append(line[:marker_at])
+            break
+        stderr_parts.append(line)
+
+    _report_errors_and_status(_clean_warm_shell_errors("".join(stderr_parts), status[0]), status[0])
+    return status[0]
+
+
+def _run_in_warm_shell(commands):
+    """Run shell strings in the warm shell, one after another.
+
+    Each command's output, errors and exit code are reported as it finishes, as if it
+    had run on its own. Returns the exit codes, or None if the shell can't be used.
+    """
+    process = _get_warm_shell()
+    if process is None:
+        return None
+    marker = _WARM_SHELL_MARKER
+    cwd = shlex.quote(os.getcwd())
+    # A single line: bash reads all of it before running anything, so writing a long
+    # batch can't block on a stdout pipe that we only start reading afterwards.
+    script = "; ".join(f"cd -- {cwd} && ( eval {shlex.quote(command)} ) {_WARM_SHELL['stdin_redirect']}; "
+                       f"printf '%s %d\\n' {marker} $?; printf '%s\\n' {marker} >&2" for command in commands) + "\n"
+    try:
+        process.stdin.write(script)
+        process.stdin.flush()
+    except OSError:
+        _discard_warm_shell()
+        return None
+
+    try:
+        return [_collect_warm_shell_result(process) for _ in commands]
+    except KeyboardInterrupt:
+        _discard_warm_shell()
+        raise
+
+
+def _run_shell(command):
+    """Run a shell string, through the warm shell when possible."""
+    return _run_shell_batch([command])[0]
+
+
+def _run_shell_batch(commands):
+    """Run shell strings in order, each reported on its own; returns their exit codes."""
+    returncodes = _run_in_warm_shell(commands)
+    if returncodes is None:
+        returncodes = [_run_streamed(command, shell=True) for command in commands]
+    return returncodes
+
+
+# Arguments made only of these characters print the same quoted or not (the set
+# shlex.quote leaves alone), so the echo can skip quoting them.
+_SHELL_SAFE_ARG = re.compile(r'\A[\w@%+=:,./-]+\Z', re.ASCII).match
+
+
+def _echo_join(command_list):
+    """Shell-quoted rendering of an argv list for the 'Executing:' echo."""
+    return " ".join(arg if _SHELL_SAFE_ARG(arg) else shlex.quote(arg) for arg in command_list)
+
+
+# Absolute path of each external binary found so far, so repeated commands skip the
+# PATH walk. Misses are not cached: something installed mid-session is still found.
+_WHICH_CACHE = {}
+
+
+def _resolve_exe(name):
+    """Return the absolute path of `name` on PATH, or `name` itself if it isn't found."""
+    path = _WHICH_CACHE.get(name)
+    if path is None:
+        path = shutil.which(name)
+        if path is None:
+            return name
+        _WHICH_CACHE[name] = path
+    return path
+
+
+# Actions that talk to the terminal themselves (git commit opens an editor), so
+# their output is never captured and they are spawned without any pipes.
+_INTERACTIVE_ACTIONS = {'git_commit'}
+
+
+def _run_attached(command_list, executable=None):
+    """Run a command on the inherited stdin/stdout/stderr and return its exit code.
+
+    Uses posix_spawnp where available, which skips the pipe setup and the fork of
+    a large parent; falls back to subprocess elsewhere.
+    """
+    if not hasattr(os, 'posix_spawnp'):
+        return subprocess.run(command_list, executable=executable).returncode
+    sys.stdout.flush(); sys.stderr.flush()
+    pid = os.posix_spawnp(executable or command_list[0], command_list, os.environ)
+    try:
+        _, status = os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        # The child got the same SIGINT; reap it before propagating.
+        os.waitpid(pid, 0)
+        raise
+    exit_code = os.waitstatus_to_exitcode(status) if hasattr(os, 'waitstatus_to_exitcode') else status >> 8
+    if exit_code != 0: _write_error(_ERR_EXIT_CODE, exit_code)
+    return exit_code
+
+
+def _report_system_stats():
+    """Print system memory usage via psutil.
+
+    virtual_memory() is system-wide, so it is sampled outside any Process.oneshot()
+    block; per-process metrics added here should be read together inside a single
+    ``with psutil.Process().oneshot():`` so psutil batches the underlying reads.
+    """
+    import psutil  # deferred: only the memory action needs it, and it is slow to import
+    now = time.monotonic()
+    if _MEM_CACHE['v'] is None or now - _MEM_CACHE['t'] > _MEM_MIN_INTERVAL:
+        _MEM_CACHE['v'] = psutil.virtual_memory(); _MEM_CACHE['t'] = now
+    mem = _MEM_CACHE['v']; gb_divisor = 1024**3
+    sys.stdout.write(_MEM_TPL.format(mem.total/gb_divisor, mem.available/gb_divisor, mem.used/gb_divisor, mem.percent)); sys.stdout.flush()
+
+
+def _report_memory_usage(action):
+    try:
+        _report_system_stats()
+    except ImportError: _write_error(_ERR_NO_PSUTIL)
+    except Exception as e: _write_error(_ERR_PSUTIL, e)
+
+def _report_chdir_success(action):
+    print("✅ Directory changed successfully."); sys.stdout.flush()
+
+def _report_create_file_success(action):
+    print("✅ File created successfully by Python."); sys.stdout.flush()
+
+def _report_current_directory(action):
+    _write_output_lines([os.getcwd() + "\n"])
+
+def _report_current_user(action):
+    try:
+        import pwd
+        user_name = pwd.getpwuid(os.geteuid()).pw_name  # what `whoami` prints
+    except (ImportError, KeyError):
+        user_name = getpass.getuser()
+    _write_output_lines([user_name + "\n"])
+
+def _already_reported(action):
+    """The failure (or 'already exists' note) was printed where it happened."""
+
+# Marker returned by get_platform_command -> handler for actions finished in Python.
+_ACTION_HANDLERS = {
+    "PYTHON_HANDLED_CHDIR_SUCCESS": _report_chdir_success,
+    "PYTHON_HANDLED_CHDIR_FAIL": _already_reported,
+    "PYTHON_PSUTIL_MEM": _report_memory_usage,
+    "PYTHON_HANDLED_CREATE_FILE_SUCCESS": _report_create_file_success,
+    "PYTHON_HANDLED_CREATE_FILE_EXISTS": _already_reported,
+    "PYTHON_SHOW_PATH": _report_current_directory,
+    "PYTHON_WHOAMI": _report_current_user,
+}
+
+
+def _build_pipe_command(commands, report=True):
+    """Join piped command structs into a single shell string, or return None.
+
+    With report=False nothing is printed; execute_commands uses that to probe
+    whether a pipe can join a batch before handing it to execute_command.
+    """
+    if commands and all(c.get('type') != 'raw_command' and c.get('action') in _PASSTHROUGH_ACTIONS for c in commands):
+        return " | ".join([shlex.join([*_RESOLVED_CMDS[c['action']], *map(str, c.get('args', []))]) for c in commands])
+
+    command_segments_for_shell = []
+    for cmd_struct in commands:
+        segment_type = cmd_struct.get('type')
+        cmd_parts_for_segment = []
+        if segment_type == 'raw_command':
+            cmd_parts_for_segment.append(cmd_struct['command'])
+            cmd_parts_for_segment.extend(cmd_struct.get('args', []))
+        else:
+            action = cmd_struct.get('action'); args = cmd_struct.get('args', [])
+            if action == 'change_directory':
+                 if not report: return None
+                 _write_error(_ERR_PIPE_CD, f"{action} {' '.join(args)}")
+            platform_cmd_list_or_action_str = get_platform_command(action, args, in_pipe=True)
+            if platform_cmd_list_or_action_str is None:
+                if report: _write_error(_ERR_PIPE_UNMAPPABLE, action)
+                return None
+            if isinstance(platform_cmd_list_or_action_str, str) and platform_cmd_list_or_action_str.startswith("PYTHON_"):
+                if report: _write_error(_ERR_PIPE_PYTHON_ACTION, action)
+                return None
+            if isinstance(platform_cmd_list_or_action_str, str) and platform_cmd_list_or_action_str.startswith("ACTION_UNSUPPORTED"):
+                if report: _write_error(_ERR_PIPE_UNSUPPORTED, platform_cmd_list_or_action_str.split(':')[1])
+                return None
+            cmd_parts_for_segment = platform_cmd_list_or_action_str
+
+        if cmd_parts_for_segment:
+            cmd_parts_for_segment = [str(p) for p in cmd_parts_for_segment]
+            try: command_segments_for_shell.append(shlex.join(cmd_parts_for_segment))
+            except AttributeError: command_segments_for_shell.append(" ".join(shlex.quote(str(p)) for p in cmd_parts_for_segment))
+        else:
+            if report: _write_error(_ERR_PIPE_SEGMENT, cmd_struct)
+            return None
+
+    return " | ".join(command_segments_for_shell) if command_segments_for_shell else None
+
+
+def _batchable_command_string(parsed_command):
+    """Shell string for a command that can share a batch shell, or None to run it alone.
+
+    Only commands whose shell text Zyntax builds itself (quoted argv lists and pipes of
+    them) qualify; raw user shell strings could end the batch early (`exit`, a trailing
+    `&`) and Python-handled actions must run in this process.
+    """
+    if not parsed_command or parsed_command.get('type') in ('raw_shell_string', 'raw_command'):
+        return None
+    if parsed_command.get('type') == 'piped_commands':
+        if any(c.get('action') in _PYTHON_HANDLED_ACTIONS for c in parsed_command.get('commands', [])):
+            return None
+        return _build_pipe_command(parsed_command.get('commands', []), report=False)
+
+    action = parsed_command.get('action')
+    if action is None or action in _PYTHON_HANDLED_ACTIONS or action in _INTERACTIVE_ACTIONS:
+        return None
+    command_list = get_platform_command(action, parsed_command.get('args', []))
+    if not isinstance(command_list, list):
+        return None
+    return shlex.join([str(part) for part in command_list])
+
+
+def execute_commands(parsed_commands):
+    """Execute parsed commands in order, running consecutive plain ones in one shell.
+
+    Each separate execute_command() pays a fork/exec; runs of batchable commands are
+    written to the shell in one go instead. Every command in a batch still runs even
+    if the previous one failed, and its output, errors and exit code are reported
+    right after it. Anything else flushes the pending batch and runs on its own.
+    Windows always runs commands one by one.
+    """
+    pending = []
+
+    def flush_pending():
+        if not pending: return
+        batch = pending.copy()
+        pending.clear()
+        if _VERBOSE: print(f"🛠️ Executing Batch: {'; '.join(batch)}"); sys.stdout.flush()
+        try:
+            _run_shell_batch(batch)
+        except Exception as e: _write_error(_ERR_BATCH, e)
+
+    for parsed_command in parsed_commands:
+        command_string = _batchable_command_string(parsed_command) if _OS_NAME != 'Windows' else None
+        if command_string:
+            pending.append(command_string)
+        else:
+            flush_pending()
+            execute_command(parsed_command)
+    flush_pending()
+
+
 def execute_command(parsed_command):
     if not parsed_command:
-        print("❓ Parser returned an unexpected result (None or empty)."); sys.stdout.flush()
+        _write_error(_ERR_EMPTY_PARSE)
         return
 
     command_type = parsed_command.get('type')
 
     if command_type == 'raw_shell_string':
         full_raw_command = parsed_command.get('command_string')
-        if not full_raw_command: print("❌ Error: Raw shell string command is empty."); sys.stdout.flush(); return
-        print(f"🛠️ Executing Raw Shell String: {full_raw_command}"); sys.stdout.flush()
+        if not full_raw_command: _write_error(_ERR_EMPTY_RAW); return
+        if _VERBOSE: print(f"🛠️ Executing Raw Shell String: {full_raw_command}"); sys.stdout.flush()
         try:
-            result = subprocess.run(full_raw_command, shell=True, capture_output=True, text=True, check=False, errors='ignore')
-            if result.stdout: print(f"--- Output ---\n{result.stdout.strip()}\n--------------"); sys.stdout.flush()
-            if result.stderr: print(f"--- Errors ---\n{result.stderr.strip()}\n--------------"); sys.stdout.flush()
-            if result.returncode != 0: print(f"⚠️ Command finished with exit code: {result.returncode}"); sys.stdout.flush()
-        except Exception as e: print(f"❌ An unexpected error occurred during raw shell string execution: {e}"); sys.stdout.flush()
+            _run_shell(full_raw_command)
+        except Exception as e: _write_error(_ERR_RAW_SHELL, e)
         return
 
     if command_type == 'raw_command' and 'commands' not in parsed_command:
         command_parts = [parsed_command.get('command')] + parsed_command.get('args', [])
         raw_cmd_string = " ".join(str(p) for p in command_parts) # Allow shell glob expansion
 
-        print(f"🛠️ Executing Single Raw Command (shell=True): {raw_cmd_string}"); sys.stdout.flush()
+        if _VERBOSE: print(f"🛠️ Executing Single Raw Command (shell=True): {raw_cmd_string}"); sys.stdout.flush()
         try:
-            result = subprocess.run(raw_cmd_string, shell=True, capture_output=True, text=True, check=False, errors='ignore')
-            if result.stdout: print(f"--- Output ---\n{result.stdout.strip()}\n--------------"); sys.stdout.flush()
-            if result.stderr: print(f"--- Errors ---\n{result.stderr.strip()}\n--------------"); sys.stdout.flush()
-            if result.returncode != 0: print(f"⚠️ Command finished with exit code: {result.returncode}"); sys.stdout.flush()
-        except Exception as e: print(f"❌ An unexpected error occurred during single raw_command execution: {e}"); sys.stdout.flush()
+            _run_shell(raw_cmd_string)
+        except Exception as e: _write_error(_ERR_RAW_COMMAND, e)
         return
 
     if command_type == 'piped_commands':
-        command_segments_for_shell = []
-        for cmd_struct in parsed_command.get('commands', []):
-            segment_type = cmd_struct.get('type')
-            cmd_parts_for_segment = []
-            if segment_type == 'raw_command':
-                cmd_parts_for_segment.append(cmd_struct['command'])
-                cmd_parts_for_segment.extend(cmd_struct.get('args', []))
-            else:
-                action = cmd_struct.get('action'); args = cmd_struct.get('args', [])
-                if action == 'change_directory':
-                     print(f"Warning: 'cd' action in pipe segment ('{action} {' '.join(args)}'). This won't affect subsequent piped commands in this execution string."); sys.stdout.flush()
-                platform_cmd_list_or_action_str = get_platform_command(action, args)
-                if platform_cmd_list_or_action_str is None: print(f"❌ Error: Piped segment '{action}' unmappable."); sys.stdout.flush(); return
-                if isinstance(platform_cmd_list_or_action_str, str) and platform_cmd_list_or_action_str.startswith("PYTHON_"):
-                    print(f"❌ Error: Python-internal action '{action}' cannot be part of a shell pipe string."); sys.stdout.flush(); return
-                if isinstance(platform_cmd_list_or_action_str, str) and platform_cmd_list_or_action_str.startswith("ACTION_UNSUPPORTED"):
-                    print(f"❌ Error: {platform_cmd_list_or_action_str.split(':')[1]} is not supported directly on this OS's command line."); sys.stdout.flush(); return
-                cmd_parts_for_segment = platform_cmd_list_or_action_str
-
-            if cmd_parts_for_segment:
-                cmd_parts_for_segment = [str(p) for p in cmd_parts_for_segment]
-                try: command_segments_for_shell.append(shlex.join(cmd_parts_for_segment))
-                except AttributeError: command_segments_for_shell.append(" ".join(shlex.quote(str(p)) for p in cmd_parts_for_segment))
-            else: print(f"❌ Error: Could not form command parts for pipe segment: {cmd_struct}"); sys.stdout.flush(); return
-
-        if command_segments_for_shell:
-            full_pipe_command = " | ".join(command_segments_for_shell)
-            print(f"🛠️ Executing Piped Command: {full_pipe_command}"); sys.stdout.flush()
+        full_pipe_command = _build_pipe_command(parsed_command.get('commands', []))
+        if full_pipe_command:
+            if _VERBOSE: print(f"🛠️ Executing Piped Command: {full_pipe_command}"); sys.stdout.flush()
             try:
-                result = subprocess.run(full_pipe_command, shell=True, capture_output=True, text=True, check=False, errors='ignore')
-                if result.stdout: print(f"--- Output ---\n{result.stdout.strip()}\n--------------"); sys.stdout.flush()
-                if result.stderr: print(f"--- Errors ---\n{result.stderr.strip()}\n--------------"); sys.stdout.flush()
-                if result.returncode != 0: print(f"⚠️ Command finished with exit code: {result.returncode}"); sys.stdout.flush()
-            except Exception as e: print(f"❌ An unexpected error during piped execution: {e}"); sys.stdout.flush()
+                _run_shell(full_pipe_command)
+            except Exception as e: _write_error(_ERR_PIPE, e)
         return
 
     action = parsed_command.get('action')
     args = parsed_command.get('args', [])
     if action is None:
-        print(f"❓ Error: No action specified in parsed command: {parsed_command}"); sys.stdout.flush()
+        _write_error(_ERR_NO_ACTION, parsed_command)
         return
+    action = sys.intern(action)
 
     command_list_or_action_str = get_platform_command(action, args)
 
-    if command_list_or_action_str is None: print(f"❓ Command action '{action}' could not be executed (get_platform_command returned None)."); sys.stdout.flush(); return
+    if command_list_or_action_str is None: _write_error(_ERR_UNMAPPED_ACTION, action); return
 
     if isinstance(command_list_or_action_str, str):
-        if command_list_or_action_str == "PYTHON_HANDLED_CHDIR_SUCCESS": print(f"✅ Directory changed successfully."); sys.stdout.flush()
-        elif command_list_or_action_str == "PYTHON_HANDLED_CHDIR_FAIL": pass
-        elif command_list_or_action_str == "PYTHON_PSUTIL_MEM":
-            try:
-                mem = psutil.virtual_memory(); gb_divisor = 1024**3
-                print(f"--- Memory Usage (psutil) ---\n  Total: {mem.total/gb_divisor:.2f} GB\n  Available: {mem.available/gb_divisor:.2f} GB\n  Used: {mem.used/gb_divisor:.2f} GB ({mem.percent}%)\n-----------------------------"); sys.stdout.flush()
-            except ImportError: print("❌ Error: psutil library not found. Please install it: pip install psutil"); sys.stdout.flush()
-            except Exception as e: print(f"❌ Error getting memory info via psutil: {e}"); sys.stdout.flush()
-        elif command_list_or_action_str == "PYTHON_HANDLED_CREATE_FILE_SUCCESS": print(f"✅ File created successfully by Python."); sys.stdout.flush()
-        elif command_list_or_action_str == "PYTHON_HANDLED_CREATE_FILE_EXISTS": pass
+        handler = _ACTION_HANDLERS.get(command_list_or_action_str)
+        if handler: handler(action)
         elif command_list_or_action_str.startswith("ACTION_UNSUPPORTED_ON_CMD:"):
-            print(f"❌ Error: Action '{command_list_or_action_str.split(':')[1]}' is not directly supported on this OS's command line via Zyntax yet."); sys.stdout.flush()
-        else: print(f"❌ Internal Error: Unrecognized Python-handled action string '{command_list_or_action_str}'"); sys.stdout.flush()
+            _write_error(_ERR_UNSUPPORTED, command_list_or_action_str.split(':')[1])
+        else: _write_error(_ERR_UNKNOWN_MARKER, command_list_or_action_str)
         return
 
     if not isinstance(command_list_or_action_str, list):
-        print(f"❌ Internal Error: Expected command_list to be a list, got {type(command_list_or_action_str)} for action '{action}'"); sys.stdout.flush(); return
+        _write_error(_ERR_NOT_A_LIST, type(command_list_or_action_str), action); return
 
     command_list_str = [str(part) for part in command_list_or_action_str]
 
-    final_command_to_print = ""
-    try:
-        final_command_to_print = shlex.join(command_list_str)
-    except AttributeError:
-        final_command_to_print = " ".join(shlex.quote(str(p)) for p in command_list_str)
-
-    print(f"🛠️ Executing: {final_command_to_print}"); sys.stdout.flush()
+    if _VERBOSE:
+        print(f"🛠️ Executing: {_echo_join(command_list_str)}"); sys.stdout.flush()
     try:
         # Determine if we need shell=True for Windows built-in commands
         use_shell = needs_shell_on_windows(command_list_str)
@@ -304,12 +756,14 @@ def execute_command(parsed_command):
         if use_shell:
             # For Windows shell built-ins, we need to join the command and use shell=True
             shell_command = " ".join(command_list_str)
-            result = subprocess.run(shell_command, capture_output=True, text=True, check=False, shell=True, errors='ignore')
+            _run_streamed(shell_command, shell=True)
         else:
-            result = subprocess.run(command_list_str, capture_output=True, text=True, check=False, shell=False, errors='ignore')
-            
-        if result.stdout: print(f"--- Output ---\n{result.stdout.strip()}\n--------------"); sys.stdout.flush()
-        if result.stderr: print(f"--- Errors ---\n{result.stderr.strip()}\n--------------"); sys.stdout.flush()
-        if result.returncode != 0: print(f"⚠️ Command finished with exit code: {result.returncode}"); sys.stdout.flush()
-    except FileNotFoundError: print(f"❌ Error: Command '{command_list_str[0]}' not found."); sys.stdout.flush()
-    except Exception as e: print(f"❌ An unexpected error occurred: {e}"); sys.stdout.flush()
+            executable = _resolve_exe(command_list_str[0])
+            if executable == command_list_str[0] and os.sep not in executable:
+                raise FileNotFoundError(executable)  # not on PATH: report it without forking
+            if action in _INTERACTIVE_ACTIONS:
+                _run_attached(command_list_str, executable=executable)
+            else:
+                _run_streamed(command_list_str, shell=False, executable=executable)
+    except FileNotFoundError: _write_error(_ERR_NOT_FOUND, command_list_str[0])
+    except Exception as e: _write_error(_ERR_UNEXPECTED, e)
@@ -2,29 +2,169 @@
 Zyntax - A smart NLP-powered terminal for natural language command execution.
 """
 
+import logging
 import sys
 import os
+import stat
+import threading
 import traceback
-import spacy
-from .nlp_engine.parser import parse_input
-from .command_executor.executor import execute_command
+from .nlp_engine.parser import parse_input, parse_inputs, warm_up
+from .command_executor.executor import execute_command, execute_commands
 
 IS_UNDER_TEST_RUNNER = os.environ.get("ZYNTAX_TEST_MODE") == "1"
 
-try:
-    nlp = spacy.load("en_core_web_sm")
-except OSError:
-    print("Downloading spaCy model en_core_web_sm...")
-    sys.stdout.flush()
-    spacy.cli.download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm")
+
+def _is_executable(structured_command):
+    """True for parse results that go straight to the executor (no prompt or message)."""
+    action = structured_command.get('action')
+    command_type = structured_command.get('type')
+    if action in ('unrecognized', 'suggest', 'error'):
+        return False
+    return bool(command_type == 'raw_shell_string' or
+                command_type == 'piped_commands' or
+                (command_type == 'raw_command' and 'commands' not in structured_command) or
+                action)
+
+
+def _handle_command(structured_command, read_line):
+    """Act on one parse result; read_line supplies the answer to a suggestion prompt.
+
+    Returns False when the session should end.
+    """
+    if not structured_command:
+        print("❓ Parser returned an unexpected result (None or empty).")
+        return True
+
+    action = structured_command.get('action')
+
+
+    if action == 'unrecognized':
+        print("❓ Command not recognized.")
+
+    elif action == 'suggest':
+        suggestion_phrase = structured_command.get('suggestion_phrase', 'that command')
+        suggestion_action_id = structured_command.get('suggestion_action_id')
+        suggested_args = structured_command.get('args', [])
+
+        if not suggestion_action_id:
+            print("❓ Suggestion error: No action ID provided.")
+            return True
+
+        try:
+            prompt_message = f"Did you mean: '{suggestion_phrase}' with args {suggested_args}? (y/n): "
+            if IS_UNDER_TEST_RUNNER:
+                sys.stdout.write(prompt_message + "\n")
+            else:
+                sys.stdout.write(prompt_message)
+            sys.stdout.flush()
+
+            confirmation_line = read_line()
+            if not confirmation_line and IS_UNDER_TEST_RUNNER:
+                return False
+            confirmation = confirmation_line.strip().lower()
+
+            if confirmation == 'y' or confirmation == 'yes':
+                confirmed_command = {
+                    'action': suggestion_action_id,
+                    'args': suggested_args
+                }
+                execute_command(confirmed_command)
+            else:
+                print("Okay, command cancelled.")
+
+        except (EOFError, KeyboardInterrupt):
+            print("\nExiting during suggestion...")
+            return False
+        except Exception as e:
+            print(f"Error processing suggestion: {e}")
+
+    elif action == 'error':
+        print(f"❗ Error: {structured_command.get('message', 'Parser error')}")
+
+    elif _is_executable(structured_command):
+        execute_command(structured_command)
+
+    else:
+         print(f"❓ Unhandled command structure in main: {structured_command}")
+
+
+    return True
+
+
+def _is_regular_file(stream):
+    try:
+        return stat.S_ISREG(os.fstat(stream.fileno()).st_mode)
+    except (AttributeError, OSError, ValueError):
+        return False
+
+
+def _run_script(stream):
+    """Run every line of a non-interactive stdin.
+
+    A file redirected to stdin is read whole and parsed in one batch, and consecutive
+    directly executable commands are executed as one batch. Anything else, such as a
+    pipe from another program, is parsed and run line by line as it arrives. Lines
+    after a suggestion are consumed as its y/n answer, as they would be when typed.
+    """
+    if _is_regular_file(stream):
+        lines = [line.strip() for line in stream]
+        entries = iter(zip(lines, parse_inputs(lines)))
+        streaming = False
+    else:
+        entries = ((line, parse_input(line)) for line in (raw_line.strip() for raw_line in stream))
+        streaming = True
+
+    def read_line():
+        entry = next(entries, None)
+        return entry[0] + "\n" if entry else ""
+
+    pending = []
+    for user_input, structured_command in entries:
+        if user_input.lower() in ['exit', 'quit']:
+            break
+        if not user_input:
+            continue
+        if structured_command and _is_executable(structured_command):
+            pending.append(structured_command)
+            if streaming:
+                execute_commands(pending)
+                pending.clear()
+            continue
+        execute_commands(pending)
+        pending.clear()
+        if not _handle_command(structured_command, read_line):
+            break
+    execute_commands(pending)
+
 
 def main():
     """Main entry point for Zyntax CLI."""
     print("🚀 Zyntax - Natural Language Terminal")
     print("💬 Type commands in natural language (English/Hinglish). Type 'exit' to quit.")
     print()
-    
+
+    if os.environ.get("ZYNTAX_DEBUG", "") == "1":
+        logging.basicConfig(format="Debug: %(message)s")
+        logging.getLogger("zyntax").setLevel(logging.DEBUG)
+
+    # A new session starts from an empty parse cache.
+    parse_input.cache_clear()
+
+    if not IS_UNDER_TEST_RUNNER and not sys.stdin.isatty():
+        try:
+            _run_script(sys.stdin)
+        except KeyboardInterrupt:
+            print("\nExiting Zyntax (KeyboardInterrupt)...")
+        except Exception as e:
+            print(f"❌ UNEXPECTED ERROR IN MAIN LOOP: {e}")
+            traceback.print_exc()
+        print("\nGoodbye!")
+        sys.stdout.flush()
+        return
+
+    # Build the spaCy pipeline while the user types the first command rather than on it.
+    threading.Thread(target=warm_up, daemon=True).start()
+
     while True:
         try:
             if IS_UNDER_TEST_RUNNER:
@@ -33,7 +173,6 @@ def main():
                 user_input_line = sys.stdin.readline()
 
                 if not user_input_line:
-                    sys.stdout.flush()
                     break
                 user_input = user_input_line.strip()
             else:
@@ -43,101 +182,23 @@ def main():
                 break
 
             if not user_input:
-                if IS_UNDER_TEST_RUNNER:
-                     sys.stdout.flush()
                 continue
 
 
             structured_command = parse_input(user_input)
-            sys.stdout.flush()
-
-            if not structured_command:
-                print("❓ Parser returned an unexpected result (None or empty).")
-                sys.stdout.flush()
-                continue
-
-            action = structured_command.get('action')
-            command_type = structured_command.get('type')
-
 
-            if action == 'unrecognized':
-                print("❓ Command not recognized.")
-                sys.stdout.flush()
-
-            elif action == 'suggest':
-                suggestion_phrase = structured_command.get('suggestion_phrase', 'that command')
-                suggestion_action_id = structured_command.get('suggestion_action_id')
-                suggested_args = structured_command.get('args', [])
-
-                if not suggestion_action_id:
-                    print("❓ Suggestion error: No action ID provided.")
-                    sys.stdout.flush()
-                    continue
-
-                try:
-                    prompt_message = f"Did you mean: '{suggestion_phrase}' with args {suggested_args}? (y/n): "
-                    if IS_UNDER_TEST_RUNNER:
-                        sys.stdout.write(prompt_message + "\n")
-                    else:
-                        sys.stdout.write(prompt_message)
-                    sys.stdout.flush()
-
-                    confirmation_line = sys.stdin.readline()
-                    if not confirmation_line and IS_UNDER_TEST_RUNNER:
-                        sys.stdout.flush()
-                        break
-                    confirmation = confirmation_line.strip().lower()
-
-                    if confirmation == 'y' or confirmation == 'yes':
-                        sys.stdout.flush()
-                        confirmed_command = {
-                            'action': suggestion_action_id,
-                            'args': suggested_args
-                        }
-                        execute_command(confirmed_command)
-                    else:
-                        print("Okay, command cancelled.")
-                        sys.stdout.flush()
-
-                except (EOFError, KeyboardInterrupt):
-                    print("\nExiting during suggestion...")
-                    sys.stdout.flush()
-                    break
-                except Exception as e:
-                    print(f"Error processing suggestion: {e}")
-                    sys.stdout.flush()
-
-            elif action == 'error':
-                print(f"❗ Error: {structured_command.get('message', 'Parser error')}")
-                sys.stdout.flush()
-
-            elif command_type == 'raw_shell_string' or \
-                 command_type == 'piped_commands' or \
-                 (command_type == 'raw_command' and 'commands' not in structured_command):
-                execute_command(structured_command)
-
-            elif action:
-                 execute_command(structured_command)
-
-            else:
-                 print(f"❓ Unhandled command structure in main: {structured_command}")
-                 sys.stdout.flush()
-
-
-            sys.stdout.flush()
+            if not _handle_command(structured_command, sys.stdin.readline):
+                break
 
         except EOFError:
             print("\nEOF received on input(), exiting Zyntax main loop.")
-            sys.stdout.flush()
             break
         except KeyboardInterrupt:
             print("\nExiting Zyntax (KeyboardInterrupt)...")
-            sys.stdout.flush()
             break
         except Exception as e:
             print(f"❌ UNEXPECTED ERROR IN MAIN LOOP: {e}")
             traceback.print_exc()
-            sys.stdout.flush()
             break
 
 
@@ -0,0 +1,27 @@
+"""
+Shared spaCy pipeline for Zyntax.
+Loaded on first use so that every module works off a single copy of the pipeline.
+"""
+
+import threading
+
+import spacy
+
+# The parser only reads token text, offsets and lexical flags (lower_, is_punct),
+# all of which come from the English tokenizer and vocab. A blank English pipeline
+# provides exactly that, with no trained model to download or run.
+LANGUAGE = "en"
+
+_NLP = None
+# get_nlp() may race between the startup warm-up thread and the first parse.
+_NLP_LOCK = threading.Lock()
+
+
+def get_nlp():
+    """Return the shared spaCy pipeline, creating it on first call."""
+    global _NLP
+    if _NLP is None:
+        with _NLP_LOCK:
+            if _NLP is None:
+                _NLP = spacy.blank(LANGUAGE)
+    return _NLP
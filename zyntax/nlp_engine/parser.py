@@ -3,29 +3,35 @@ Natural language parser for terminal commands.
 Converts plain English input into structured command representations.
 """
 
+import copy
+import logging
 import re
-import spacy
 from rapidfuzz import process, fuzz
 from spacy.lang.en.stop_words import STOP_WORDS
-import traceback
 import shlex
 import os
+import sys
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+
+from .model import get_nlp
+
+logger = logging.getLogger("zyntax.parser")
+# Read once; the debug calls below sit on the per-parse path and are skipped outright when off.
+_DEBUG = os.environ.get("ZYNTAX_DEBUG", "") == "1"
 
 # Configuration
 FUZZY_MATCH_THRESHOLD_EXECUTE = 85
 FUZZY_MATCH_THRESHOLD_SUGGEST = 60
 ENTITY_FILTER_FUZZY_THRESHOLD = 88
-
-# Load spaCy Model
+# Texts per nlp.pipe() batch in parse_inputs(); malformed values fall back to the default.
 try:
-    nlp = spacy.load("en_core_web_sm", disable=['ner'])
-except OSError:
-    print("Downloading spaCy model en_core_web_sm...")
-    spacy.cli.download("en_core_web_sm")
-    nlp = spacy.load("en_core_web_sm", disable=['ner'])
+    SPACY_BATCH_SIZE = max(1, int(os.environ.get("ZYNTAX_SPACY_BATCH_SIZE", "64")))
+except ValueError:
+    SPACY_BATCH_SIZE = 64
 
 # --- Enhanced Lexicons ---
-HINGLISH_STOP_WORDS = {
+HINGLISH_STOP_WORDS = frozenset({
     "ek", "oye", "kya", "kaise", "hai", "hain", "toh", "na", "bhai", "zara", "plz", "pleej", "krdo", "krna", "krne",
     "hua", "hui", "kiye", "diya", "gaya", "tha", "thi", "abhi", "main", "kis", "andar", "hoon",
     "saari", "wala", "wali", "liye", "mera", "meri", "mere", "mujhe", "humko", "iss", "uss", "yeh", "woh", "aur", "bhi",
@@ -37,14 +43,14 @@ HINGLISH_STOP_WORDS = {
     "just", "don", "should", "now", "he", "she", "it", "me", "my", "you", "your", "yours", "please", "using", "via",
     "contents", "empty", "new", "working", "one", "level", "current", "everything", "location", "arguments", "text",
     "hey", "yo", "yaar", "abe", "naam", "cheezein", "cheez"
-}
+})
 
 
-HINGLISH_COMMAND_VERBS = {
+HINGLISH_COMMAND_VERBS = frozenset({
     "banao", "bana", "kardo", "dikhao", "batao", "karo", "khol", "band", "likho", "padho", "chalao", "badlo", "jao", "hatao",
     "dekh", "sun", "bol", "kar", "chal", "rakh", "le", "de", "maar", "nikal", "ghus", "uth", "baith", "soch", "samajh",
     "pakad", "chhod", "daal", "pheko", "la", "leja", "istemaal", "istemal", "prayoga", "executable", "jaana", "count"
-}
+})
 
 ACTION_KEYWORDS = {
     # Show Path
@@ -170,14 +176,29 @@ ACTION_KEYWORDS = {
     "ipconfig": "network_interfaces",
 }
 
-ARG_SPLIT_KEYWORDS = {'to', 'as', 'into', 'se', 'ko', 'mein', 'aur', 'and', 'of', 'in', 'called'}
+# Interned so the action ids handed to the executor share one object per name.
+ACTION_KEYWORDS = {phrase: sys.intern(action) for phrase, action in ACTION_KEYWORDS.items()}
+
+# Keyword phrases as a tuple, so fuzzy matching iterates a plain sequence rather than a dict view.
+ACTION_KEYWORD_PHRASES = tuple(ACTION_KEYWORDS)
+# Longest first, the order the fuzzy ranking breaks ties in; sorted once rather than per parse.
+ACTION_PHRASES_BY_LENGTH = tuple(sorted(ACTION_KEYWORDS, key=len, reverse=True))
 
-COMMAND_VERBS = (
+# Action groups used when ranking fuzzy candidates and refining arguments.
+CONSTRUCTIVE_ACTIONS = frozenset({"make_directory", "create_file", "make_executable"})
+INFO_ACTIONS = frozenset({"show_path", "list_files", "whoami", "git_status", "show_processes", "disk_usage", "memory_usage", "system_uptime", "network_interfaces", "env_variables", "display_file", "display_file_head", "display_file_tail", "count_lines"})
+NO_ARG_ACTIONS = frozenset({'show_path', 'whoami', 'git_status', 'git_init', 'system_uptime', 'network_interfaces', 'env_variables'})
+OPT_ARG_ACTIONS = frozenset({'show_processes', 'disk_usage', 'memory_usage', 'list_files'})
+SINGLE_ARG_ACTIONS = frozenset({'make_directory', 'create_file', 'delete_file', 'delete_directory', 'display_file', 'make_executable', 'count_lines'})
+
+ARG_SPLIT_KEYWORDS = frozenset({'to', 'as', 'into', 'se', 'ko', 'mein', 'aur', 'and', 'of', 'in', 'called'})
+
+COMMAND_VERBS = frozenset(
     {'ls', 'cd', 'pwd', 'mkdir', 'rm', 'cp', 'mv', 'ps', 'df', 'free', 'git', 'cat', 'touch', 'view', 'rmdir', 'dir', 'md', 'del', 'rd', 'copy', 'move', 'ren', 'rename', 'go', 'enter', 'navigate', 'display', 'check', 'initialize', 'commit', 'generate', 'remove', 'get', 'rid', 'tell', 'print', 'duplicate', 'make', 'show', 'list', 'change', 'delete', 'grep', 'find', 'filter', 'chmod', 'ping', 'uptime', 'ifconfig', 'ipconfig', 'env', 'wc', 'head', 'tail', 'curl', 'wget', 'tar', 'zip', 'unzip'} |
     HINGLISH_COMMAND_VERBS
 )
 
-ENTITY_IGNORE_WORDS = (
+ENTITY_IGNORE_WORDS = frozenset(
     STOP_WORDS | HINGLISH_STOP_WORDS | COMMAND_VERBS |
     {'file', 'folder', 'directory', 'named', 'with',
      'from', 'a', 'the', 'me', 'my', 'please', 'using',
@@ -187,6 +208,21 @@ ENTITY_IGNORE_WORDS = (
      'lines', 'python', 'script', 'backup', 'user', 'interfaces', 'called'}
 )
 ENTITY_IGNORE_WORDS_FOR_PHRASE_BUILDING = ENTITY_IGNORE_WORDS - ARG_SPLIT_KEYWORDS
+# Words that mark a lone display_file argument as leftover phrasing rather than a file name.
+DISPLAY_FILE_NOISE_WORDS = COMMAND_VERBS | ENTITY_IGNORE_WORDS_FOR_PHRASE_BUILDING
+# Filler dropped from the candidate args of move_rename, copy_file and chmod.
+MULTI_ARG_IGNORE_WORDS = ENTITY_IGNORE_WORDS_FOR_PHRASE_BUILDING - {"."}
+# Words skipped before a git commit message starts when it has to be pieced together from args.
+COMMIT_MSG_IGNORE_WORDS = ENTITY_IGNORE_WORDS_FOR_PHRASE_BUILDING - COMMAND_VERBS - {"-m"}
+# Filler that select_primary_argument never picks as an action's main argument.
+SELECTION_IGNORE_WORDS = ENTITY_IGNORE_WORDS_FOR_PHRASE_BUILDING - COMMAND_VERBS
+
+# Matched phrases that send change_directory straight to the parent or the home directory.
+CD_PARENT_PHRASES = frozenset({"go up one level", "go back", "cd ..", "ek level peeche", "peeche jao", "ek level upar", "go to parent directory"})
+CD_HOME_PHRASES = frozenset({"change to home directory", "cd ~", "ghar jao", "navigate to home directory"})
+CD_HOME_ARGS = frozenset({'home', '~', 'ghar'})
+# Hinglish ways of asking what is in the current folder; any args found with them are filler.
+HINGLISH_LIST_QUERY_PHRASES = ("kya kya", "cheezein", "andar kya hai", "dikhao", "batao", "folder mein kya", "current folder mein kya", "is folder mein kya", "saare python files dikha do")
 
 
 NL_PIPE_INDICATORS = [
@@ -196,33 +232,83 @@ NL_PIPE_INDICATORS = [
 ]
 NL_PIPE_PATTERN = re.compile("|".join(NL_PIPE_INDICATORS), re.IGNORECASE)
 
-COMMON_SHELL_CMDS = {
+COMMON_SHELL_CMDS = frozenset({
     'wc', 'awk', 'sed', 'tr', 'sort', 'uniq', 'head', 'tail', 'cut', 'xargs', 'tee', 'du', 'find', 'ping',
     'uptime', 'ifconfig', 'ipconfig', 'env', 'curl', 'wget', 'tar', 'zip', 'unzip'
-}
+})
 REDIRECTION_CHARS = ['>', '<', '>>']
 
+# Characters that make a token look like a path, file name, number or quoted text rather
+# than a word. Tested with isdisjoint() so the scan over the token runs in C.
+ARG_MARKER_CHARS = frozenset('./\\0123456789"')
+MULTI_ARG_MARKER_CHARS = frozenset('./\\0123456789*')
+# A direct command's argument string containing any of these is more than one plain shell word.
+SHELL_WORD_BREAK_CHARS = frozenset(' \t\'"\\')
+
+DIRECT_COMMANDS = {
+    'cd ': 'change_directory', 'ls': 'list_files', 'pwd': 'show_path',
+    'rm ': 'delete_file', 'rmdir ': 'delete_directory', 'mkdir ': 'make_directory',
+    'mv ': 'move_rename', 'cp ': 'copy_file', 'cat ': 'display_file',
+    'touch ': 'create_file', 'whoami': 'whoami', 'df ': 'disk_usage', 'df': 'disk_usage',
+    'free ': 'memory_usage', 'free': 'memory_usage',
+    'ps ': 'show_processes', 'ps': 'show_processes',
+    'git status': 'git_status', 'git init': 'git_init', 'git commit ': 'git_commit',
+    'grep ': 'grep', 'chmod ': 'chmod', 'ping ': 'ping',
+    'tail ': 'display_file_tail', 'head ': 'display_file_head', 'wc ': 'raw_command',
+    'env': 'env_variables', 'ifconfig': 'network_interfaces', 'ipconfig': 'network_interfaces', 'uptime': 'system_uptime'
+}
+# Longest first, so the alternation settles on the most specific prefix ('ps ' over 'ps').
+DIRECT_COMMAND_PATTERN = re.compile("|".join(re.escape(cmd) for cmd in sorted(DIRECT_COMMANDS, key=len, reverse=True)))
+# Bare direct commands ('pwd', 'git status') always parse to their action with no args.
+NO_ARG_DIRECT_COMMANDS = {cmd: action for cmd, action in DIRECT_COMMANDS.items() if not cmd.endswith(' ')}
+
+# Generic nouns that are dropped when an entity is just a (mis)spelling of one of them.
+ENTITY_FUZZY_KEYWORDS = ('folder', 'directory', 'file')
+
+# Patterns used on every parse, compiled once.
+PATH_PATTERN = re.compile(r"([\"'])(.+?)\1|((?:~|\.\.|\.)?/(?:[a-zA-Z0-9_./\- ]|\\ )+/?)|([a-zA-Z0-9_.-]+\.[a-zA-Z0-9_*-]+)|(\.\.)|([a-zA-Z0-9_*'-]+(?:[/\\].*)?)")
+FILENAME_PATTERN = re.compile(r"(\w+\.\w+)")
+COMMIT_MSG_PATTERN = re.compile(r"(?:-m|message)\s+([\"'])(.+?)\1", re.IGNORECASE)
+WORD_TOKEN_PATTERN = re.compile(r"^[a-zA-Z0-9_]+$")
+NAAM_SE_PATTERN = re.compile(r"(.+?)\s+naam\s+se")
+NAAM_KA_PATTERN = re.compile(r"naam\s+ka\s+(.+)")
+CHMOD_MODE_PATTERN = re.compile(r"^[0-7]{3,4}$|^[ugoa]*[-+=][rwxXstugo]*$")
+GREP_QUOTED_REDIRECT_PATTERN = re.compile(r"grep\s+.*?([\"'])(.+?[><].*?)\1", re.IGNORECASE)
+# Characters shlex treats specially: quotes, escapes and whitespace beyond its own ' \t\r\n'.
+SHLEX_SPECIAL_PATTERN = re.compile(r"[\"'\\]|[^\S \t\r\n]")
 
-def _is_token_covered(token, processed_char_indices):
-    start_idx, end_idx = token.idx, token.idx + len(token.text)
-    covered_count = 0
-    for i in range(start_idx, end_idx):
-        if i < len(processed_char_indices) and processed_char_indices[i]:
-            covered_count += 1
-    return covered_count > (len(token.text) * 0.5)
 
+# Docs tagged ahead of time by parse_inputs(), keyed by text.
+_PIPED_DOCS = {}
 
-def _is_valid_start_of_entity_phrase(token_lower, token_text, doc, token_idx):
-    if any(c in token_text for c in './\\0123456789"') or token_text in ['..', '~'] or token_text.startswith('"') or token_text.startswith("'"):
-        if token_text == '.' and token_idx + 1 < len(doc):
-            next_token_text = doc[token_idx + 1].text
-            if re.match(r"^[a-zA-Z0-9_]+$", next_token_text):
+
+def _make_doc(text):
+    doc = _PIPED_DOCS.get(text)
+    return doc if doc is not None else get_nlp()(text)
+
+
+def _split_args(text):
+    """shlex.split(), skipping the lexer when the text has nothing for it to interpret."""
+    if SHLEX_SPECIAL_PATTERN.search(text): return shlex.split(text)
+    return text.split()
+
+
+def _is_token_covered(token_start, token_end, processed_chars):
+    covered_count = processed_chars.count(1, token_start, token_end)
+    return covered_count > ((token_end - token_start) * 0.5)
+
+
+def _is_valid_start_of_entity_phrase(token_lower, token_text, token_texts, token_lowers, token_idx):
+    if not ARG_MARKER_CHARS.isdisjoint(token_text) or token_text in ['..', '~'] or token_text.startswith('"') or token_text.startswith("'"):
+        if token_text == '.' and token_idx + 1 < len(token_texts):
+            next_token_text = token_texts[token_idx + 1]
+            if WORD_TOKEN_PATTERN.match(next_token_text):
                 return True
         else:
             return True
     is_command_verb_strict = token_lower in COMMAND_VERBS
     if is_command_verb_strict:
-        if token_idx > 0 and doc[token_idx-1].lower_ in {"ps", "df", "free", "ls", "grep", "find", "tail", "head", "wc"}:
+        if token_idx > 0 and token_lowers[token_idx-1] in {"ps", "df", "free", "ls", "grep", "find", "tail", "head", "wc"}:
              return True
         return False
     return token_lower not in ENTITY_IGNORE_WORDS_FOR_PHRASE_BUILDING or \
@@ -231,7 +317,7 @@ def _is_valid_start_of_entity_phrase(token_lower, token_text, doc, token_idx):
 def _is_valid_continuation_of_entity_phrase(token_lower, token_text):
     if token_lower in ARG_SPLIT_KEYWORDS: return True
     return token_lower not in ENTITY_IGNORE_WORDS_FOR_PHRASE_BUILDING or \
-           any(c in token_text for c in './\\0123456789"') or \
+           not ARG_MARKER_CHARS.isdisjoint(token_text) or \
            token_text in ['..', '~'] or token_text.endswith('"') or token_text.endswith("'")
 
 
@@ -239,89 +325,94 @@ def extract_relevant_entities(doc_for_entities, text_for_extraction):
     entities_with_spans = []
     if text_for_extraction is None: text_for_extraction = ""
 
-    processed_char_indices = [False] * len(text_for_extraction)
-    doc_tokens = list(doc_for_entities)
+    # One byte per character of the text, set to 1 once a match or token has claimed it.
+    processed_chars = bytearray(len(text_for_extraction))
+    # Token attributes read once into flat lists; the loop below and its helpers index these.
+    token_texts = [token.text for token in doc_for_entities]
+    token_lowers = [token.lower_ for token in doc_for_entities]
+    token_starts = [token.idx for token in doc_for_entities]
+    token_puncts = [token.is_punct for token in doc_for_entities]
 
     def mark_processed(start, end):
-        for i in range(start, end):
-            if 0 <= i < len(processed_char_indices): processed_char_indices[i] = True
+        start, end = max(start, 0), min(end, len(processed_chars))
+        if start < end: processed_chars[start:end] = b'\x01' * (end - start)
+
+    # Entity texts seen so far, exact and lowercased, for O(1) duplicate checks.
+    seen_entity_texts, seen_entity_texts_lower = set(), set()
 
-    path_pattern = r"([\"'])(.+?)\1|((?:~|\.\.|\.)?/(?:[a-zA-Z0-9_./\- ]|\\ )+/?)|([a-zA-Z0-9_.-]+\.[a-zA-Z0-9_*-]+)|(\.\.)|([a-zA-Z0-9_*'-]+(?:[/\\].*)?)"
+    def add_entity(entity_text, span):
+        entities_with_spans.append((entity_text, span))
+        seen_entity_texts.add(entity_text); seen_entity_texts_lower.add(entity_text.lower())
+        mark_processed(*span)
 
-    for match in re.finditer(path_pattern, text_for_extraction):
+    for match in PATH_PATTERN.finditer(text_for_extraction):
         entity_text = match.group(2) or match.group(3) or match.group(4) or match.group(5) or match.group(6)
         if entity_text:
             entity_text = entity_text.strip()
             start, end = match.span()
-            already_covered_chars = sum(1 for i in range(start,end) if processed_char_indices[i])
+            already_covered_chars = processed_chars.count(1, start, end)
             if already_covered_chars < (end - start) * 0.5 and entity_text:
                 is_path = '/' in entity_text or '\\' in entity_text or entity_text in ['..', '~'] or '*' in entity_text
-                already_exists = any((entity_text == et) or (not is_path and entity_text.lower() == et.lower()) for et, _ in entities_with_spans)
+                already_exists = entity_text in seen_entity_texts or (not is_path and entity_text.lower() in seen_entity_texts_lower)
                 if not already_exists:
-                    entities_with_spans.append((entity_text, (start, end)))
-                    mark_processed(start, end)
+                    add_entity(entity_text, (start, end))
 
-    current_phrase_tokens_text = []
     current_phrase_start_char = -1
-    for token_idx, token in enumerate(doc_tokens):
-        is_covered_by_regex = _is_token_covered(token, processed_char_indices)
-        if not is_covered_by_regex and not token.is_punct:
-            token_lower = token.lower_
-            token_text = token.text
-            if not current_phrase_tokens_text:
-                if _is_valid_start_of_entity_phrase(token_lower, token_text, doc_tokens, token_idx):
-                    current_phrase_start_char = token.idx
-                    current_phrase_tokens_text.append(token_text)
+    current_phrase_end_char = -1
+    for token_idx, (token_text, token_lower, token_start, token_is_punct) in enumerate(zip(token_texts, token_lowers, token_starts, token_puncts)):
+        token_end = token_start + len(token_text)
+        is_covered_by_regex = _is_token_covered(token_start, token_end, processed_chars)
+        if not is_covered_by_regex and not token_is_punct:
+            if current_phrase_start_char == -1:
+                if _is_valid_start_of_entity_phrase(token_lower, token_text, token_texts, token_lowers, token_idx):
+                    current_phrase_start_char = token_start
+                    current_phrase_end_char = token_end
                 else:
-                    if token_lower in ENTITY_IGNORE_WORDS: mark_processed(token.idx, token.idx + len(token.text))
+                    if token_lower in ENTITY_IGNORE_WORDS: mark_processed(token_start, token_end)
             elif _is_valid_continuation_of_entity_phrase(token_lower, token_text):
-                current_phrase_tokens_text.append(token_text)
+                current_phrase_end_char = token_end
             else:
-                if current_phrase_tokens_text:
-                    entity_text = " ".join(current_phrase_tokens_text).strip()
+                if current_phrase_start_char != -1:
+                    entity_text = text_for_extraction[current_phrase_start_char:current_phrase_end_char].strip()
                     if entity_text:
-                        phrase_end_char = token.idx
-                        if not any(entity_text == et for et, _ in entities_with_spans):
-                            entities_with_spans.append((entity_text, (current_phrase_start_char, phrase_end_char)))
-                            mark_processed(current_phrase_start_char, phrase_end_char)
-                    current_phrase_tokens_text = []
+                        phrase_end_char = token_start
+                        if entity_text not in seen_entity_texts:
+                            add_entity(entity_text, (current_phrase_start_char, phrase_end_char))
+                    current_phrase_end_char = -1
                     current_phrase_start_char = -1
-                if token_lower in ENTITY_IGNORE_WORDS: mark_processed(token.idx, token.idx + len(token.text))
-                elif _is_valid_start_of_entity_phrase(token_lower, token_text, doc_tokens, token_idx):
-                    current_phrase_start_char = token.idx
-                    current_phrase_tokens_text.append(token_text)
-        elif current_phrase_tokens_text:
-            entity_text = " ".join(current_phrase_tokens_text).strip()
+                if token_lower in ENTITY_IGNORE_WORDS: mark_processed(token_start, token_end)
+                elif _is_valid_start_of_entity_phrase(token_lower, token_text, token_texts, token_lowers, token_idx):
+                    current_phrase_start_char = token_start
+                    current_phrase_end_char = token_end
+        elif current_phrase_start_char != -1:
+            entity_text = text_for_extraction[current_phrase_start_char:current_phrase_end_char].strip()
             if entity_text:
-                phrase_end_char = token.idx
-                if not any(entity_text == et for et, _ in entities_with_spans):
-                     entities_with_spans.append((entity_text, (current_phrase_start_char, phrase_end_char)))
-                     mark_processed(current_phrase_start_char, phrase_end_char)
-            current_phrase_tokens_text = []
+                phrase_end_char = token_start
+                if entity_text not in seen_entity_texts:
+                     add_entity(entity_text, (current_phrase_start_char, phrase_end_char))
+            current_phrase_end_char = -1
             current_phrase_start_char = -1
-            if is_covered_by_regex or token.is_punct : mark_processed(token.idx, token.idx + len(token.text))
-    if current_phrase_tokens_text:
-        entity_text = " ".join(current_phrase_tokens_text).strip()
+            if is_covered_by_regex or token_is_punct : mark_processed(token_start, token_end)
+    if current_phrase_start_char != -1:
+        entity_text = text_for_extraction[current_phrase_start_char:current_phrase_end_char].strip()
         if entity_text:
             phrase_end_char = len(text_for_extraction)
-            if not any(entity_text == et for et, _ in entities_with_spans):
-                 if current_phrase_start_char != -1 :
-                    entities_with_spans.append((entity_text, (current_phrase_start_char, phrase_end_char)))
-                    mark_processed(current_phrase_start_char, phrase_end_char)
+            if entity_text not in seen_entity_texts:
+                 add_entity(entity_text, (current_phrase_start_char, phrase_end_char))
 
     entities_with_spans.sort(key=lambda x: x[1][0])
     current_entities_text = [entity_tuple[0] for entity_tuple in entities_with_spans if entity_tuple[0]]
 
     final_filtered_entities = []
-    fuzzy_check_list_args = ['folder', 'directory', 'file']
     for entity in current_entities_text:
+        # Features shared by the checks below, computed once per entity.
         entity_lower = entity.lower()
+        has_digit = any(char.isdigit() for char in entity)
+        looks_like_path = '.' in entity or '/' in entity or '\\' in entity or '*' in entity or entity in ('..', '~')
+        is_double_quoted = entity.startswith('"') and entity.endswith('"')
         is_path_like_or_num_or_long_or_quoted_or_wild = (
-            '.' in entity or '/' in entity or '\\' in entity or entity in ['..','~'] or
-            any(char.isdigit() for char in entity) or len(entity)>2 or
-            (entity.startswith('"') and entity.endswith('"')) or
-            (entity.startswith("'") and entity.endswith("'")) or
-            '*' in entity
+            looks_like_path or has_digit or len(entity) > 2 or is_double_quoted or
+            (entity.startswith("'") and entity.endswith("'"))
         )
 
         if entity_lower in COMMAND_VERBS and not is_path_like_or_num_or_long_or_quoted_or_wild and entity_lower not in ARG_SPLIT_KEYWORDS:
@@ -330,29 +421,36 @@ def extract_relevant_entities(doc_for_entities, text_for_extraction):
             if not entity.isdigit():
                 continue
 
-        is_fuzzy_keyword = False
-        for keyword in fuzzy_check_list_args:
-            if fuzz.ratio(entity_lower, keyword) > ENTITY_FILTER_FUZZY_THRESHOLD + 5:
-                 looks_like_arg_f = (any(char.isdigit() for char in entity) or '/' in entity or '\\' in entity or '.' in entity or entity in ['..', '~'] or '*' in entity or (entity.startswith('"') and entity.endswith('"')))
-                 if not looks_like_arg_f:
-                      is_fuzzy_keyword = True; break
-        if is_fuzzy_keyword: continue
+        # One C-level pass over the keywords; the best score beats the threshold iff any does.
+        closest_keyword = process.extractOne(entity_lower, ENTITY_FUZZY_KEYWORDS, scorer=fuzz.ratio, processor=None,
+                                             score_cutoff=ENTITY_FILTER_FUZZY_THRESHOLD + 5)
+        if closest_keyword and closest_keyword[1] > ENTITY_FILTER_FUZZY_THRESHOLD + 5:
+            if not (has_digit or looks_like_path or is_double_quoted): continue
 
         if entity: final_filtered_entities.append(entity)
 
-    seen = set()
-    unique_entities = [x for x in final_filtered_entities if not (x.lower() in seen or seen.add(x.lower()))]
-    # print(f"Debug (extract_entities from '{text_for_extraction}'): Final entities: {unique_entities}")
+    # Case-insensitive dedupe that keeps each entity's first spelling, in order.
+    first_by_lower = {}
+    for entity in final_filtered_entities: first_by_lower.setdefault(entity.lower(), entity)
+    unique_entities = list(first_by_lower.values())
+    if _DEBUG: logger.debug("extract_entities from %r: final entities: %s", text_for_extraction, unique_entities)
     return unique_entities
 
 
 def select_primary_argument(args_list, action_id=None, current_text_segment=""):
     if not args_list: return None
+    return _select_primary_argument_cached(tuple(args_list), current_text_segment)
+
+
+# The mv/cp refiners ask for the primary argument of the same (args, segment) pair several
+# times per parse; the choice only depends on those two, so it is memoised.
+@lru_cache(maxsize=512)
+def _select_primary_argument_cached(args_list, current_text_segment):
     original_text_lower = current_text_segment.lower()
 
     if "naam" in original_text_lower:
-        match_before = re.search(r"(.+?)\s+naam\s+se", original_text_lower)
-        match_after = re.search(r"naam\s+ka\s+(.+)", original_text_lower)
+        match_before = NAAM_SE_PATTERN.search(original_text_lower)
+        match_after = NAAM_KA_PATTERN.search(original_text_lower)
         potential_arg_text = None
         if match_before:
             potential_arg_text = match_before.group(1).strip().split()[-1]
@@ -372,16 +470,240 @@ def select_primary_argument(args_list, action_id=None, current_text_segment=""):
         if '/' in arg_candidate or '\\' in arg_candidate or '.' in arg_candidate or arg_candidate in ['..', '~'] or '*' in arg_candidate:
             return arg_candidate
 
-    selection_ignore_words = ENTITY_IGNORE_WORDS - ARG_SPLIT_KEYWORDS - COMMAND_VERBS
 
     for arg_candidate in reversed(args_list):
-        if arg_candidate.lower() not in selection_ignore_words:
+        if arg_candidate.lower() not in SELECTION_IGNORE_WORDS:
             return arg_candidate
 
     if args_list: return args_list[-1].strip()
     return None
 
 
+# What the argument refiners need to know about the segment being parsed.
+_SegmentMatch = namedtuple('_SegmentMatch', [
+    'text_segment', 'text_lower_segment', 'args_text_to_parse', 'matched_direct',
+    'matched_phrase_for_intent', 'initial_args_str_segment', 'is_part_of_pipe'])
+
+# Each _refine_* turns the extracted entities into the action's final args. It returns the
+# args list, or an error result dict when required arguments are missing.
+
+
+def _refine_change_directory(action_id, args, seg):
+    matched_phrase_lower = seg.matched_phrase_for_intent.lower() if seg.matched_phrase_for_intent else ""
+    if matched_phrase_lower in CD_PARENT_PHRASES:
+        return ['..']
+    if matched_phrase_lower in CD_HOME_PHRASES:
+        return ['~']
+    selected_arg = select_primary_argument(args, action_id, seg.text_segment)
+    if selected_arg:
+        if selected_arg.lower() in CD_HOME_ARGS or selected_arg == os.path.expanduser("~"): return ['~']
+        elif selected_arg == '..': return ['..']
+        else: return [selected_arg]
+    if not args and not (seg.matched_direct and not seg.initial_args_str_segment): return ['~']
+    return []
+
+
+def _refine_no_args(action_id, args, seg):
+    return []
+
+
+def _refine_optional_args(action_id, args, seg):
+    if action_id == 'list_files':
+        if seg.matched_direct and seg.matched_phrase_for_intent.lower() == 'ls' and seg.initial_args_str_segment:
+            try: return _split_args(seg.initial_args_str_segment)
+            except ValueError: return [seg.initial_args_str_segment]
+        is_general_hinglish_list_query = any(kw in seg.text_lower_segment for kw in HINGLISH_LIST_QUERY_PHRASES)
+        if not args:
+            return []
+        elif (len(args) <= 2 and all(fuzz.ratio(arg.lower(), "ls") > 70 or fuzz.ratio(arg.lower(), "list") > 70 or arg.lower() in {"files", "file", "directory", "directories"} for arg in args)) and \
+             not any('/' in arg or '.' in arg or '\\' in arg or arg == '..' or arg == '~' or arg.startswith('-') for arg in args):
+            if args and _DEBUG: logger.debug("Clearing noisy command-like args for 'list_files': %s", args)
+            return []
+        elif is_general_hinglish_list_query and not any(arg_item for arg_item in args if '.' in arg_item or '/' in arg_item or '\\' in arg_item):
+            if args and _DEBUG: logger.debug("Clearing all args for general Hinglish 'list_files' query. Original NLP args: %s", args)
+            return []
+        return args
+    if seg.matched_direct and seg.initial_args_str_segment:
+        try: return _split_args(seg.initial_args_str_segment)
+        except ValueError: return [seg.initial_args_str_segment]
+    return args
+
+
+def _refine_single_arg(action_id, args, seg):
+    if args and (action_id == 'display_file' or action_id == 'count_lines') and seg.args_text_to_parse == "":
+        return args
+    selected_arg = select_primary_argument(args, action_id, seg.text_segment)
+    if selected_arg: return [selected_arg]
+    if args and action_id == 'display_file' and len(args) == 1 and not any(kw in args[0] for kw in DISPLAY_FILE_NOISE_WORDS):
+         return args
+    elif seg.matched_direct and not seg.initial_args_str_segment and action_id not in ['make_executable']:
+         return {'action': 'error', 'message': f"Missing argument for {action_id}"}
+    elif not args and action_id not in ['make_executable']:
+         return {'action': 'error', 'message': f"Missing argument for {action_id}"}
+    return []
+
+
+def _refine_head_tail(action_id, args, seg):
+    if args and seg.args_text_to_parse == "":
+        if len(args) == 2 and args[0].isdigit():
+            return args
+        elif len(args) == 1:
+            if args[0].isdigit():
+                 return {'action': 'error', 'message': f"Missing filename for {action_id} with lines {args[0]}"}
+            return args
+        else:
+             return {'action': 'error', 'message': f"Incorrect arguments for {action_id} from special phrase: {args}"}
+
+    elif args:
+        if len(args) >= 2 and args[0].isdigit():
+            return [args[0], select_primary_argument(args[1:], action_id, seg.text_segment) or " ".join(args[1:])]
+        if args[0] == '-n' and len(args) > 2 and args[1].isdigit():
+            return [args[1], select_primary_argument(args[2:], action_id, seg.text_segment) or " ".join(args[2:])]
+        elif args[0].startswith('-') and args[0][1:].isdigit() and len(args) > 1:
+            return [args[0][1:], select_primary_argument(args[1:], action_id, seg.text_segment) or " ".join(args[1:])]
+        return [select_primary_argument(args, action_id, seg.text_segment) or args[0]]
+
+    if seg.matched_direct and seg.initial_args_str_segment:
+         parsed_args = _split_args(seg.initial_args_str_segment)
+         if not parsed_args : return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
+         return parsed_args
+    return {'action': 'error', 'message': f"Missing filename for {action_id}"}
+
+
+def _refine_grep(action_id, args, seg):
+    if seg.matched_direct and seg.matched_phrase_for_intent.lower() == 'grep ':
+        try: return _split_args(seg.initial_args_str_segment) if seg.initial_args_str_segment else []
+        except ValueError: return [seg.initial_args_str_segment] if seg.initial_args_str_segment else []
+    elif args:
+        if seg.args_text_to_parse == "" and len(args) >= 1:
+            return [arg.strip("'\"") for arg in args]
+        pattern_cand, file_cand, remaining_args_grep = None, None, list(args)
+        for i, arg_val in enumerate(remaining_args_grep):
+            if (arg_val.startswith('"') and arg_val.endswith('"')) or \
+               (arg_val.startswith("'") and arg_val.endswith("'")):
+                pattern_cand = arg_val
+                remaining_args_grep.pop(i)
+                break
+        if not pattern_cand and remaining_args_grep:
+            for i, arg_val in enumerate(remaining_args_grep):
+                if not ('.' in arg_val or '/' in arg_val or '\\' in arg_val or arg_val in ['..','~'] or '*' in arg_val or arg_val.startswith('-')):
+                    pattern_cand = arg_val
+                    remaining_args_grep.pop(i)
+                    break
+        if not pattern_cand and args: pattern_cand = args[0]; remaining_args_grep = args[1:] if len(args)>1 else []
+
+        if remaining_args_grep: file_cand = " ".join(remaining_args_grep)
+        elif pattern_cand and not seg.is_part_of_pipe: file_cand = "."
+
+        if pattern_cand and file_cand: return [pattern_cand.strip("'\""), file_cand.strip("'\"")]
+        elif pattern_cand: return [pattern_cand.strip("'\"")]
+        if not seg.is_part_of_pipe: return {'action': 'error', 'message': 'Grep pattern required'}
+        return []
+    elif not seg.is_part_of_pipe:
+         return {'action': 'error', 'message': 'Grep pattern and/or arguments required'}
+    return []
+
+
+def _refine_source_destination(action_id, args, seg):
+    candidate_args = list(args)
+    if seg.matched_direct and seg.initial_args_str_segment:
+        try:
+            shlex_args = [s for s in _split_args(seg.initial_args_str_segment) if s]
+            if len(shlex_args) >= (1 if action_id == 'chmod' else 2):
+                candidate_args = shlex_args
+        except ValueError: pass
+
+    clean_cand_args = [
+        arg for arg in candidate_args
+        if arg.lower() not in MULTI_ARG_IGNORE_WORDS or
+           not MULTI_ARG_MARKER_CHARS.isdisjoint(arg) or arg in ['..', '~'] or
+           (action_id == 'chmod' and CHMOD_MODE_PATTERN.match(arg))
+    ]
+    if not clean_cand_args and candidate_args: clean_cand_args = candidate_args
+
+    if action_id == 'chmod':
+        if len(clean_cand_args) >= 2:
+            perm_arg, target_arg = None, None
+            # Try to identify permission string (numeric or symbolic) vs target
+            # This assumes permission string often comes first or is distinctly formatted
+            if CHMOD_MODE_PATTERN.match(clean_cand_args[0]):
+                perm_arg = clean_cand_args[0]
+                target_arg = select_primary_argument(clean_cand_args[1:], action_id, seg.text_segment) or " ".join(clean_cand_args[1:])
+            elif CHMOD_MODE_PATTERN.match(clean_cand_args[1]): # If second arg is permission
+                perm_arg = clean_cand_args[1]
+                target_arg = clean_cand_args[0]
+            else: # Fallback
+                perm_arg = clean_cand_args[0]
+                target_arg = " ".join(clean_cand_args[1:])
+
+            if perm_arg and target_arg: return [perm_arg, target_arg]
+        return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
+
+    source, destination = None, None
+    if len(clean_cand_args) >= 2:
+        split_found_keyword = False
+        for i in range(len(clean_cand_args) - 2, -1, -1):
+            if clean_cand_args[i].lower() in ARG_SPLIT_KEYWORDS:
+                source_parts = clean_cand_args[:i]; dest_parts = clean_cand_args[i+1:]
+                if source_parts and dest_parts:
+                    source = select_primary_argument(source_parts, action_id, seg.text_segment) or " ".join(source_parts)
+                    destination = select_primary_argument(dest_parts, action_id, seg.text_segment) or " ".join(dest_parts)
+                    if source and destination: split_found_keyword = True; break
+        if not split_found_keyword:
+            source = clean_cand_args[0]
+            destination = " ".join(clean_cand_args[1:]) if len(clean_cand_args) > 1 else None
+            if len(clean_cand_args) > 2 and destination: # If "move file1 file2 file3", source=file1, dest=file2 file3
+                 # This needs more robust splitting if no keyword. Assume first is source, second is dest for now.
+                 destination = clean_cand_args[1] # Take only the immediate next as destination
+                 # Any further args would be problematic for simple mv/cp
+
+        if source and destination: return [source, destination]
+        elif source: return {'action': 'error', 'message': f"Missing destination for {action_id}"}
+        return {'action': 'error', 'message': f"Missing source/destination for {action_id}"}
+    elif len(clean_cand_args) == 1: return {'action': 'error', 'message': f"Missing destination for {action_id}"}
+    return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
+
+
+def _refine_git_commit(action_id, args, seg):
+    msg_match = COMMIT_MSG_PATTERN.search(seg.text_segment)
+    if msg_match: return ["-m", msg_match.group(2)]
+    fallback_msg = ""
+    if seg.matched_direct and seg.initial_args_str_segment:
+        fallback_msg = seg.initial_args_str_segment.strip().strip("'\"")
+    elif args:
+        commit_msg_parts = []
+        potential_msg_started = False
+        for arg_val in args:
+            if arg_val.lower() not in COMMIT_MSG_IGNORE_WORDS or \
+               (arg_val.startswith('"') and arg_val.endswith('"')) or \
+               (arg_val.startswith("'") and arg_val.endswith("'")) or \
+               potential_msg_started:
+                commit_msg_parts.append(arg_val.strip("'\""))
+                potential_msg_started = True
+        if not commit_msg_parts and args: commit_msg_parts = args
+        if commit_msg_parts: fallback_msg = " ".join(commit_msg_parts)
+
+    if fallback_msg: return ["-m", fallback_msg]
+    return {'action': 'error', 'message': 'Commit message required'}
+
+
+def _refine_passthrough(action_id, args, seg):
+    return args
+
+
+# action_id -> argument refiner; actions not listed keep their extracted args as-is.
+_ARG_REFINERS = {
+    'change_directory': _refine_change_directory,
+    **dict.fromkeys(NO_ARG_ACTIONS, _refine_no_args),
+    **dict.fromkeys(OPT_ARG_ACTIONS, _refine_optional_args),
+    **dict.fromkeys(SINGLE_ARG_ACTIONS, _refine_single_arg),
+    'display_file_head': _refine_head_tail, 'display_file_tail': _refine_head_tail,
+    'grep': _refine_grep,
+    'move_rename': _refine_source_destination, 'copy_file': _refine_source_destination, 'chmod': _refine_source_destination,
+    'git_commit': _refine_git_commit,
+}
+
+
 def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
     text_lower_segment = text_segment.lower().strip()
     if not text_lower_segment: return None
@@ -391,40 +713,26 @@ def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
     matched_direct = False
     args = []
 
-    direct_commands = {
-        'cd ': 'change_directory', 'ls': 'list_files', 'pwd': 'show_path',
-        'rm ': 'delete_file', 'rmdir ': 'delete_directory', 'mkdir ': 'make_directory',
-        'mv ': 'move_rename', 'cp ': 'copy_file', 'cat ': 'display_file',
-        'touch ': 'create_file', 'whoami': 'whoami', 'df ': 'disk_usage', 'df': 'disk_usage',
-        'free ': 'memory_usage', 'free': 'memory_usage',
-        'ps ': 'show_processes', 'ps': 'show_processes',
-        'git status': 'git_status', 'git init': 'git_init', 'git commit ': 'git_commit',
-        'grep ': 'grep', 'chmod ': 'chmod', 'ping ': 'ping',
-        'tail ': 'display_file_tail', 'head ': 'display_file_head', 'wc ': 'raw_command',
-        'env': 'env_variables', 'ifconfig': 'network_interfaces', 'ipconfig': 'network_interfaces', 'uptime': 'system_uptime'
-    }
-    for cmd_prefix_key, mapped_action in direct_commands.items():
-        cmd_prefix_lower = cmd_prefix_key.lower()
-        if text_lower_segment.startswith(cmd_prefix_lower):
-            if mapped_action == 'raw_command':
-                try:
-                    shlex_parts = shlex.split(text_segment)
-                    if shlex_parts: return {'type': 'raw_command', 'command': shlex_parts[0], 'args': shlex_parts[1:], 'segment_text': text_segment}
-                except ValueError: pass
-                break
-
-            if not cmd_prefix_lower.endswith(' ') and text_lower_segment != cmd_prefix_lower:
-                continue
+    direct_match = DIRECT_COMMAND_PATTERN.match(text_lower_segment)
+    if direct_match:
+        cmd_prefix_key = direct_match.group()
+        mapped_action = DIRECT_COMMANDS[cmd_prefix_key]
+        if mapped_action == 'raw_command':
+            try:
+                shlex_parts = _split_args(text_segment)
+                if shlex_parts: return {'type': 'raw_command', 'command': shlex_parts[0], 'args': shlex_parts[1:], 'segment_text': text_segment}
+            except ValueError: pass
+        # Prefixes without a trailing space ('ls', 'pwd', 'git status') must be the whole input.
+        elif cmd_prefix_key.endswith(' ') or text_lower_segment == cmd_prefix_key:
             action_id, initial_args_str_segment = mapped_action, text_segment[len(cmd_prefix_key):].strip()
             matched_direct, matched_phrase_for_intent = True, cmd_prefix_key.strip()
 
             if action_id == 'delete_file' and ('-r' in initial_args_str_segment.lower() or '-rf' in initial_args_str_segment.lower()):
                 action_id = 'delete_directory'
-            break
 
     if not action_id:
         try:
-            shlex_parts_check = shlex.split(text_segment)
+            shlex_parts_check = _split_args(text_segment)
             if shlex_parts_check:
                 first_word_lower = shlex_parts_check[0].lower()
                 if is_part_of_pipe and first_word_lower in COMMON_SHELL_CMDS:
@@ -443,7 +751,7 @@ def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
                 elif first_word_lower in COMMON_SHELL_CMDS:
                     is_nlp_phrase_match = False
                     if not action_id:
-                        temp_fuzzy_matches = process.extractOne(text_lower_segment, ACTION_KEYWORDS.keys(), scorer=fuzz.WRatio, score_cutoff=FUZZY_MATCH_THRESHOLD_EXECUTE + 5)
+                        temp_fuzzy_matches = process.extractOne(text_lower_segment, ACTION_KEYWORD_PHRASES, scorer=fuzz.WRatio, processor=None, score_cutoff=FUZZY_MATCH_THRESHOLD_EXECUTE + 5)
                         if temp_fuzzy_matches and ACTION_KEYWORDS[temp_fuzzy_matches[0]] != 'raw_command':
                             is_nlp_phrase_match = True
                     if not is_nlp_phrase_match:
@@ -451,12 +759,13 @@ def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
         except ValueError: pass
 
 
-    if not matched_direct and not action_id:
-        sorted_action_keywords_tuples = sorted(ACTION_KEYWORDS.items(), key=lambda item: len(item[0]), reverse=True)
-        sorted_action_phrases = [item[0] for item in sorted_action_keywords_tuples]
+    # A segment that is exactly a keyword phrase is its unique 100-score match; no ranking needed.
+    if not matched_direct and not action_id and text_lower_segment in ACTION_KEYWORDS:
+        action_id, matched_phrase_for_intent = ACTION_KEYWORDS[text_lower_segment], text_lower_segment
 
-        top_matches = process.extract( text_lower_segment, sorted_action_phrases,
-            scorer=fuzz.WRatio, limit=5, score_cutoff=FUZZY_MATCH_THRESHOLD_SUGGEST )
+    if not matched_direct and not action_id:
+        top_matches = process.extract(text_lower_segment, ACTION_PHRASES_BY_LENGTH, scorer=fuzz.WRatio,
+                                      processor=None, limit=5, score_cutoff=FUZZY_MATCH_THRESHOLD_SUGGEST)
 
         if top_matches:
             best_execute_candidate = None
@@ -466,10 +775,10 @@ def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
                     if best_execute_candidate is None:
                         best_execute_candidate = (phrase, match_score, current_action_cand)
                     else:
-                        is_current_constructive = current_action_cand in ["make_directory", "create_file", "make_executable"]
-                        is_best_constructive = best_execute_candidate[2] in ["make_directory", "create_file", "make_executable"]
-                        is_current_info = current_action_cand in ["show_path", "list_files", "whoami", "git_status", "show_processes", "disk_usage", "memory_usage", "system_uptime", "network_interfaces", "env_variables", "display_file", "display_file_head", "display_file_tail", "count_lines"]
-                        is_best_info = best_execute_candidate[2] in ["show_path", "list_files", "whoami", "git_status", "show_processes", "disk_usage", "memory_usage", "system_uptime", "network_interfaces", "env_variables", "display_file", "display_file_head", "display_file_tail", "count_lines"]
+                        is_current_constructive = current_action_cand in CONSTRUCTIVE_ACTIONS
+                        is_best_constructive = best_execute_candidate[2] in CONSTRUCTIVE_ACTIONS
+                        is_current_info = current_action_cand in INFO_ACTIONS
+                        is_best_info = best_execute_candidate[2] in INFO_ACTIONS
 
                         contains_folder_kw = any(kw in text_lower_segment for kw in ["folder", "directory", "dir", "banao"])
                         contains_file_kw = any(kw in text_lower_segment for kw in ["file", "nai", "khali", ".py", ".txt", ".js", ".sh", ".md", ".json"])
@@ -532,7 +841,7 @@ def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
                         temp_args_text_to_parse_mv = text_segment
                         if text_lower_segment.startswith(move_rename_candidate_phrase.lower()):
                             temp_args_text_to_parse_mv = text_segment[len(move_rename_candidate_phrase):].strip()
-                        temp_doc_mv = nlp(temp_args_text_to_parse_mv)
+                        temp_doc_mv = _make_doc(temp_args_text_to_parse_mv)
                         temp_args_mv = extract_relevant_entities(temp_doc_mv, temp_args_text_to_parse_mv)
                         if len(temp_args_mv) >= 2:
                             action_id = 'move_rename'
@@ -590,21 +899,24 @@ def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
             elif text_lower_segment.startswith(matched_phrase_for_intent.lower()):
                 args_text_to_parse = text_segment[len(matched_phrase_for_intent):].strip()
 
-    if args_text_to_parse != "" or not args:
-        doc_for_args_extraction = nlp(args_text_to_parse if args_text_to_parse is not None else "")
+    # A direct command with at most one plain shell word after it ('cd src', 'rm *.tmp')
+    # already has its argument list; entity extraction is only needed for longer tails.
+    if matched_direct and SHELL_WORD_BREAK_CHARS.isdisjoint(initial_args_str_segment):
+        args = [initial_args_str_segment] if initial_args_str_segment else []
+    elif args_text_to_parse != "" or not args:
+        doc_for_args_extraction = _make_doc(args_text_to_parse if args_text_to_parse is not None else "")
         extracted_entities = extract_relevant_entities(doc_for_args_extraction, args_text_to_parse if args_text_to_parse is not None else "")
         if not args:
             args = extracted_entities
 
-    if action_id == 'list_files':
-        temp_doc_for_heuristic = nlp(text_segment)
+    if action_id == 'list_files' and not matched_direct:  # bare 'ls' has nothing to reinterpret
+        temp_doc_for_heuristic = _make_doc(text_segment)
         temp_args_for_heuristic = extract_relevant_entities(temp_doc_for_heuristic, text_segment)
         primary_arg_for_heuristic = select_primary_argument(temp_args_for_heuristic, action_id, text_segment)
         if primary_arg_for_heuristic:
-            filename_pattern = r"(\w+\.\w+)"
-            is_dot_command = primary_arg_for_heuristic in ['.', '..']
-            contains_dot = '.' in primary_arg_for_heuristic
-            if (re.search(filename_pattern, primary_arg_for_heuristic) or (contains_dot and not primary_arg_for_heuristic.startswith('.'))) and not is_dot_command:
+            # A filename needs a dot, so the regex only runs on dotted args that start with one ('.env.local').
+            if '.' in primary_arg_for_heuristic and primary_arg_for_heuristic not in ('.', '..') and \
+               (not primary_arg_for_heuristic.startswith('.') or FILENAME_PATTERN.search(primary_arg_for_heuristic)):
                 action_id = 'display_file'
                 matched_phrase_for_intent = "display file"
                 suggestion_action_id, suggestion_phrase, matched_direct = None, None, False
@@ -615,291 +927,80 @@ def _parse_single_command_segment(text_segment, is_part_of_pipe=False):
         if suggestion_action_id is not None:
             if is_part_of_pipe:
                 try:
-                    shlex_parts_sugg = shlex.split(text_segment)
+                    shlex_parts_sugg = _split_args(text_segment)
                     if shlex_parts_sugg and shlex_parts_sugg[0].lower() in COMMON_SHELL_CMDS:
                         return {'type': 'raw_command', 'command': shlex_parts_sugg[0], 'args': shlex_parts_sugg[1:], 'segment_text': text_segment}
                 except ValueError: pass
-            full_segment_doc = nlp(text_segment)
+            full_segment_doc = _make_doc(text_segment)
             suggestion_args = extract_relevant_entities(full_segment_doc, text_segment)
             return {'action': 'suggest_segment', 'suggestion_action_id': suggestion_action_id,
                     'suggestion_phrase': suggestion_phrase, 'args': suggestion_args}
         else:
             if is_part_of_pipe:
                 try:
-                    shlex_parts = shlex.split(text_segment)
+                    shlex_parts = _split_args(text_segment)
                     if shlex_parts and shlex_parts[0].lower() in COMMON_SHELL_CMDS:
                          return {'type': 'raw_command', 'command': shlex_parts[0], 'args': shlex_parts[1:], 'segment_text': text_segment}
                 except ValueError: pass
             return {'action': 'unrecognized_segment', 'segment_text': text_segment}
 
-    parsed_args = []
-    NO_ARG_ACTIONS = {'show_path', 'whoami', 'git_status', 'git_init', 'system_uptime', 'network_interfaces', 'env_variables'}
-    OPT_ARG_ACTIONS = {'show_processes', 'disk_usage', 'memory_usage', 'list_files'}
-
-    if action_id == 'change_directory':
-        if matched_phrase_for_intent and matched_phrase_for_intent.lower() in ["go up one level", "go back", "cd ..", "ek level peeche", "peeche jao", "ek level upar", "go to parent directory"]:
-            parsed_args = ['..']
-        elif matched_phrase_for_intent and matched_phrase_for_intent.lower() in ["change to home directory", "cd ~", "ghar jao", "navigate to home directory"]:
-            parsed_args = ['~']
-        else:
-            selected_arg = select_primary_argument(args, action_id, text_segment)
-            if selected_arg:
-                home_path_variants = {'home', '~', 'ghar'}; actual_home_for_comp = os.path.expanduser("~")
-                if selected_arg.lower() in home_path_variants or selected_arg == actual_home_for_comp or selected_arg == '~': parsed_args = ['~']
-                elif selected_arg == '..': parsed_args = ['..']
-                else: parsed_args = [selected_arg]
-            else:
-                if not args and not (matched_direct and not initial_args_str_segment): parsed_args = ['~']
-                else: parsed_args = []
-    elif action_id in NO_ARG_ACTIONS:
-        parsed_args = []
-    elif action_id in OPT_ARG_ACTIONS:
-        if action_id == 'list_files':
-            if matched_direct and matched_phrase_for_intent.lower() == 'ls' and initial_args_str_segment:
-                try: parsed_args = shlex.split(initial_args_str_segment)
-                except ValueError: parsed_args = [initial_args_str_segment]
-            else:
-                is_general_hinglish_list_query = any(kw in text_lower_segment for kw in
-                                                    ["kya kya", "cheezein", "andar kya hai", "dikhao", "batao", "folder mein kya", "current folder mein kya", "is folder mein kya", "saare python files dikha do"])
-                if not args:
-                    parsed_args = []
-                elif (len(args) <= 2 and all(fuzz.ratio(arg.lower(), "ls") > 70 or fuzz.ratio(arg.lower(), "list") > 70 or arg.lower() in {"files", "file", "directory", "directories"} for arg in args)) and \
-                     not any('/' in arg or '.' in arg or '\\' in arg or arg == '..' or arg == '~' or arg.startswith('-') for arg in args):
-                    if args: print(f"Debug (Segment): Clearing noisy command-like args for 'list_files': {args}")
-                    parsed_args = []
-                elif is_general_hinglish_list_query and not any(arg_item for arg_item in args if '.' in arg_item or '/' in arg_item or '\\' in arg_item):
-                    if args: print(f"Debug (Segment): Clearing all args for general Hinglish 'list_files' query. Original NLP args: {args}")
-                    parsed_args = []
-                else:
-                    parsed_args = args
-        elif matched_direct and initial_args_str_segment:
-            try: parsed_args = shlex.split(initial_args_str_segment)
-            except ValueError: parsed_args = [initial_args_str_segment]
-        else:
-            parsed_args = args
-
-    elif action_id in ['make_directory', 'create_file', 'delete_file', 'delete_directory', 'display_file', 'make_executable', 'count_lines']:
-        if args and (action_id == 'display_file' or action_id == 'count_lines') and args_text_to_parse == "":
-            parsed_args = args
-        else:
-            selected_arg = select_primary_argument(args, action_id, text_segment)
-            if selected_arg: parsed_args = [selected_arg]
-            else:
-                if args and action_id == 'display_file' and len(args) == 1 and not any(kw in args[0] for kw in COMMAND_VERBS | ENTITY_IGNORE_WORDS - ARG_SPLIT_KEYWORDS):
-                     parsed_args = args
-                elif matched_direct and not initial_args_str_segment and action_id not in ['make_executable']:
-                     return {'action': 'error', 'message': f"Missing argument for {action_id}"}
-                elif not args and action_id not in ['make_executable']:
-                     return {'action': 'error', 'message': f"Missing argument for {action_id}"}
-                else: parsed_args = []
-
-
-    elif action_id in ['display_file_head', 'display_file_tail']:
-        if args and args_text_to_parse == "":
-            if len(args) == 2 and args[0].isdigit():
-                parsed_args = args
-            elif len(args) == 1:
-                if args[0].isdigit():
-                     return {'action': 'error', 'message': f"Missing filename for {action_id} with lines {args[0]}"}
-                parsed_args = args
-            else:
-                 return {'action': 'error', 'message': f"Incorrect arguments for {action_id} from special phrase: {args}"}
-
-        elif args:
-            if len(args) >= 2 and args[0].isdigit():
-                parsed_args = [args[0], select_primary_argument(args[1:], action_id, text_segment) or " ".join(args[1:])]
-            elif len(args) >= 1:
-                if args[0] == '-n' and len(args) > 2 and args[1].isdigit():
-                    parsed_args = [args[1], select_primary_argument(args[2:], action_id, text_segment) or " ".join(args[2:])]
-                elif args[0].startswith('-') and args[0][1:].isdigit() and len(args) > 1:
-                    parsed_args = [args[0][1:], select_primary_argument(args[1:], action_id, text_segment) or " ".join(args[1:])]
-                else:
-                    parsed_args = [select_primary_argument(args, action_id, text_segment) or args[0]]
-            else:
-                if matched_direct and initial_args_str_segment:
-                     parsed_args = shlex.split(initial_args_str_segment) if initial_args_str_segment else []
-                     if not parsed_args : return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
-                else: return {'action': 'error', 'message': f"Missing filename for {action_id}"}
-        else:
-            if matched_direct and initial_args_str_segment:
-                 parsed_args = shlex.split(initial_args_str_segment) if initial_args_str_segment else []
-                 if not parsed_args : return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
-            else: return {'action': 'error', 'message': f"Missing filename for {action_id}"}
-
-
-    elif action_id == 'grep':
-        if matched_direct and matched_phrase_for_intent.lower() == 'grep ':
-            try: parsed_args = shlex.split(initial_args_str_segment) if initial_args_str_segment else []
-            except ValueError: parsed_args = [initial_args_str_segment] if initial_args_str_segment else []
-        elif args:
-            if args_text_to_parse == "" and len(args) >= 1:
-                parsed_args = [arg.strip("'\"") for arg in args]
-            else:
-                pattern_cand, file_cand, remaining_args_grep = None, None, list(args)
-                for i, arg_val in enumerate(remaining_args_grep):
-                    if (arg_val.startswith('"') and arg_val.endswith('"')) or \
-                       (arg_val.startswith("'") and arg_val.endswith("'")):
-                        pattern_cand = arg_val
-                        remaining_args_grep.pop(i)
-                        break
-                if not pattern_cand and remaining_args_grep:
-                    for i, arg_val in enumerate(remaining_args_grep):
-                        if not ('.' in arg_val or '/' in arg_val or '\\' in arg_val or arg_val in ['..','~'] or '*' in arg_val or arg_val.startswith('-')):
-                            pattern_cand = arg_val
-                            remaining_args_grep.pop(i)
-                            break
-                if not pattern_cand and args: pattern_cand = args[0]; remaining_args_grep = args[1:] if len(args)>1 else []
-
-                if remaining_args_grep: file_cand = " ".join(remaining_args_grep)
-                elif pattern_cand and not is_part_of_pipe: file_cand = "."
-
-                if pattern_cand and file_cand: parsed_args = [pattern_cand.strip("'\""), file_cand.strip("'\"")]
-                elif pattern_cand: parsed_args = [pattern_cand.strip("'\"")]
-                else:
-                    if not is_part_of_pipe: return {'action': 'error', 'message': 'Grep pattern required'}
-                    parsed_args = []
-        elif not is_part_of_pipe:
-             return {'action': 'error', 'message': 'Grep pattern and/or arguments required'}
-        else: parsed_args = []
+    segment_match = _SegmentMatch(text_segment, text_lower_segment, args_text_to_parse, matched_direct,
+                                  matched_phrase_for_intent, initial_args_str_segment, is_part_of_pipe)
+    parsed_args = _ARG_REFINERS.get(action_id, _refine_passthrough)(action_id, args, segment_match)
+    if isinstance(parsed_args, dict): return parsed_args
 
+    if _DEBUG: logger.debug("Final parsed_args for action '%s': %s", action_id, parsed_args)
+    return {'action': action_id, 'args': parsed_args}
 
-    elif action_id == 'move_rename' or action_id == 'copy_file' or action_id == 'chmod':
-        candidate_args = list(args)
-        if matched_direct and initial_args_str_segment:
-            try:
-                shlex_args = [s for s in shlex.split(initial_args_str_segment) if s]
-                if len(shlex_args) >= (1 if action_id == 'chmod' else 2):
-                    candidate_args = shlex_args
-            except ValueError: pass
 
-        clean_cand_args = [
-            arg for arg in candidate_args
-            if arg.lower() not in (ENTITY_IGNORE_WORDS - ARG_SPLIT_KEYWORDS - {"."}) or
-               any(c in arg for c in './\\0123456789*') or arg in ['..', '~'] or
-               (action_id == 'chmod' and re.match(r"^[0-7]{3,4}$|^[ugoa]*[-+=][rwxXstugo]*$", arg))
-        ]
-        if not clean_cand_args and candidate_args: clean_cand_args = candidate_args
-
-        if action_id == 'chmod':
-            if len(clean_cand_args) >= 2:
-                perm_arg, target_arg = None, None
-                # Try to identify permission string (numeric or symbolic) vs target
-                # This assumes permission string often comes first or is distinctly formatted
-                if re.match(r"^[0-7]{3,4}$|^[ugoa]*[-+=][rwxXstugo]*$", clean_cand_args[0]):
-                    perm_arg = clean_cand_args[0]
-                    target_arg = select_primary_argument(clean_cand_args[1:], action_id, text_segment) or " ".join(clean_cand_args[1:])
-                elif re.match(r"^[0-7]{3,4}$|^[ugoa]*[-+=][rwxXstugo]*$", clean_cand_args[1]): # If second arg is permission
-                    perm_arg = clean_cand_args[1]
-                    target_arg = clean_cand_args[0]
-                else: # Fallback
-                    perm_arg = clean_cand_args[0]
-                    target_arg = " ".join(clean_cand_args[1:])
-
-                if perm_arg and target_arg: parsed_args = [perm_arg, target_arg]
-                else: return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
-            else: return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
-
-        elif action_id in ['move_rename', 'copy_file']:
-            source, destination = None, None
-            if len(clean_cand_args) >= 2:
-                split_found_keyword = False
-                for i in range(len(clean_cand_args) - 2, -1, -1):
-                    if clean_cand_args[i].lower() in ARG_SPLIT_KEYWORDS:
-                        source_parts = clean_cand_args[:i]; dest_parts = clean_cand_args[i+1:]
-                        if source_parts and dest_parts:
-                            source = select_primary_argument(source_parts, action_id, text_segment) or " ".join(source_parts)
-                            destination = select_primary_argument(dest_parts, action_id, text_segment) or " ".join(dest_parts)
-                            if source and destination: split_found_keyword = True; break
-                if not split_found_keyword:
-                    source = clean_cand_args[0]
-                    destination = " ".join(clean_cand_args[1:]) if len(clean_cand_args) > 1 else None
-                    if len(clean_cand_args) > 2 and destination: # If "move file1 file2 file3", source=file1, dest=file2 file3
-                         # This needs more robust splitting if no keyword. Assume first is source, second is dest for now.
-                         destination = clean_cand_args[1] # Take only the immediate next as destination
-                         # Any further args would be problematic for simple mv/cp
-
-                if source and destination: parsed_args = [source, destination]
-                elif source: return {'action': 'error', 'message': f"Missing destination for {action_id}"}
-                else: return {'action': 'error', 'message': f"Missing source/destination for {action_id}"}
-            elif len(clean_cand_args) == 1: return {'action': 'error', 'message': f"Missing destination for {action_id}"}
-            else: return {'action': 'error', 'message': f"Missing arguments for {action_id}"}
-
-
-    elif action_id == 'git_commit':
-        msg_match = re.search(r"(?:-m|message)\s+([\"'])(.+?)\1", text_segment, re.IGNORECASE)
-        if msg_match: parsed_args = ["-m", msg_match.group(2)]
-        else:
-            fallback_msg = ""
-            if matched_direct and initial_args_str_segment:
-                fallback_msg = initial_args_str_segment.strip().strip("'\"")
-            elif args:
-                commit_msg_parts = []
-                potential_msg_started = False
-                for arg_val in args:
-                    if arg_val.lower() not in (ENTITY_IGNORE_WORDS - ARG_SPLIT_KEYWORDS - COMMAND_VERBS - {"-m"}) or \
-                       (arg_val.startswith('"') and arg_val.endswith('"')) or \
-                       (arg_val.startswith("'") and arg_val.endswith("'")) or \
-                       potential_msg_started:
-                        commit_msg_parts.append(arg_val.strip("'\""))
-                        potential_msg_started = True
-                if not commit_msg_parts and args: commit_msg_parts = args
-                if commit_msg_parts: fallback_msg = " ".join(commit_msg_parts)
-
-            if fallback_msg: parsed_args = ["-m", fallback_msg]
-            else: return {'action': 'error', 'message': 'Commit message required'}
-    else:
-         parsed_args = args
-
-    # print(f"Debug (Segment): Final parsed_args for action '{action_id}': {parsed_args}")
-    return {'action': action_id, 'args': parsed_args}
+# The same segments ("ls", "grep foo", "wc -l") recur across different piped inputs, which the
+# whole-input cache cannot share. Results are only read by the pipe loop, never mutated.
+@lru_cache(maxsize=1024)
+def _parse_pipe_segment(segment_text):
+    return _parse_single_command_segment(segment_text, is_part_of_pipe=True)
 
 
-def parse_input(text):
+def _parse_input_uncached(text):
     try:
         original_text = text.strip()
+        no_arg_action = NO_ARG_DIRECT_COMMANDS.get(original_text.lower())
+        if no_arg_action: return {'action': no_arg_action, 'args': []}
         if any(char in original_text for char in REDIRECTION_CHARS):
             is_grep_quoted_redir = False
             if "grep" in original_text.lower():
-                grep_match = re.search(r"grep\s+.*?([\"'])(.+?[><].*?)\1", original_text, re.IGNORECASE)
+                grep_match = GREP_QUOTED_REDIRECT_PATTERN.search(original_text)
                 if grep_match: is_grep_quoted_redir = True
             if not is_grep_quoted_redir:
                 return {'type': 'raw_shell_string', 'command_string': original_text}
 
-        pipe_segments_raw = []
-        current_text_to_split = original_text
-        while True:
-            nl_pipe_match = NL_PIPE_PATTERN.search(current_text_to_split)
-            if nl_pipe_match:
-                first_segment = current_text_to_split[:nl_pipe_match.start()].strip()
-                if first_segment:
-                    if '|' in first_segment: pipe_segments_raw.extend(s.strip() for s in first_segment.split('|') if s.strip())
-                    else: pipe_segments_raw.append(first_segment)
-                current_text_to_split = current_text_to_split[nl_pipe_match.end():].strip()
-                if not current_text_to_split: break
-            else:
-                if current_text_to_split:
-                    if '|' in current_text_to_split: pipe_segments_raw.extend(s.strip() for s in current_text_to_split.split('|') if s.strip())
-                    else: pipe_segments_raw.append(current_text_to_split)
-                break
-        if not pipe_segments_raw and original_text: pipe_segments_raw = [original_text]
-        pipe_segments = [s.strip() for s in pipe_segments_raw if s.strip()]
+        # Most inputs are a single command; only split when there is a pipe to split on.
+        if '|' in original_text or NL_PIPE_PATTERN.search(original_text):
+            pipe_segments_raw = []
+            for nl_segment in NL_PIPE_PATTERN.split(original_text):
+                nl_segment = nl_segment.strip()
+                if '|' in nl_segment: pipe_segments_raw.extend(s.strip() for s in nl_segment.split('|') if s.strip())
+                elif nl_segment: pipe_segments_raw.append(nl_segment)
+            if not pipe_segments_raw and original_text: pipe_segments_raw = [original_text]
+            pipe_segments = [s.strip() for s in pipe_segments_raw if s.strip()]
+        else:
+            pipe_segments = [original_text]
 
         if len(pipe_segments) > 1:
             parsed_commands_list = []
             for i, segment_text in enumerate(pipe_segments):
-                segment_result = _parse_single_command_segment(segment_text, is_part_of_pipe=True)
+                segment_result = _parse_pipe_segment(segment_text)
                 if segment_result and segment_result.get('action') == 'suggest_segment':
                     return {'action': 'error', 'message': f"Ambiguous command '{segment_result.get('suggestion_phrase')}' in pipe: '{segment_text}'"}
                 if not segment_result or segment_result.get('action') in ['unrecognized_segment', 'error']:
                     if segment_result and segment_result.get('action') == 'unrecognized_segment':
                         try:
-                            shlex_parts = shlex.split(segment_text)
+                            shlex_parts = _split_args(segment_text)
                             if shlex_parts: segment_result = {'type': 'raw_command', 'command': shlex_parts[0], 'args': shlex_parts[1:], 'segment_text': segment_text}
                             else: return {'action': 'error', 'message': f"Error in pipe: '{segment_text}' - Unrecognized & could not split"}
                         except ValueError: return {'action': 'error', 'message': f"Error in pipe: '{segment_text}' - Unrecognized & shlex failed"}
                     elif segment_result and segment_result.get('type') == 'raw_shell_string':
                         try:
-                            shlex_parts_raw = shlex.split(segment_result['command_string'])
+                            shlex_parts_raw = _split_args(segment_result['command_string'])
                             segment_result = {'type': 'raw_command', 'command': shlex_parts_raw[0], 'args': shlex_parts_raw[1:], 'segment_text': segment_result['command_string']}
                         except:
                              return {'action': 'error', 'message': f"Error in pipe: Could not process raw segment '{segment_result['command_string']}'"}
@@ -925,7 +1026,69 @@ def parse_input(text):
                  return {'action': 'unrecognized'}
             return single_result
     except Exception as e:
-         print(f"❌❌❌ TOP LEVEL PARSER FUNCTION CRASHED! ❌❌❌ Text: '{text}', Error: {e}")
-         traceback.print_exc()
+         logger.exception("Parser crashed on input %r", text)
          return {'action': 'error', 'message': f'Internal parser error: {type(e).__name__}'}
 
+
+# Inputs that differ only in letter case ("Show Files" / "show files") parse to the same
+# argument-less command, so those results are shared under the case-folded text.
+# Only argument-less results: arguments keep the user's casing. LRU-bounded.
+_SEMANTIC_CACHE = OrderedDict()
+_SEMANTIC_CACHE_SIZE = 256
+
+
+def _semantic_key(text):
+    return text.strip().lower() or None
+
+
+def _parse_input_semantic(text):
+    key = _semantic_key(text)
+    if key is not None:
+        shared = _SEMANTIC_CACHE.get(key)
+        if shared is not None:
+            _SEMANTIC_CACHE.move_to_end(key)
+            return shared
+    result = _parse_input_uncached(text)
+    if (key is not None and isinstance(result, dict) and 'type' not in result and result.get('args') == []
+            and result.get('action') not in ('error', 'suggest', 'unrecognized')):
+        _SEMANTIC_CACHE[key] = result
+        if len(_SEMANTIC_CACHE) > _SEMANTIC_CACHE_SIZE: _SEMANTIC_CACHE.popitem(last=False)
+    return result
+
+
+# parse_input is a pure function of the stripped text, and users repeat the same handful
+# of commands, so parses are memoised. Surrounding whitespace is dropped from the key; case
+# is kept, since arguments are case-sensitive. Callers get a deep copy, never the cached dict.
+_parse_input_cached = lru_cache(maxsize=1024)(_parse_input_semantic)
+
+
+def parse_input(text):
+    return copy.deepcopy(_parse_input_cached(text.strip()))
+
+
+def _clear_parse_caches():
+    """Forget every memoised parse (for tests, or after changing the keyword tables)."""
+    _parse_input_cached.cache_clear()
+    _select_primary_argument_cached.cache_clear()
+    _parse_pipe_segment.cache_clear()
+    _SEMANTIC_CACHE.clear()
+
+
+parse_input.cache_clear = _clear_parse_caches
+
+
+def parse_inputs(texts):
+    """Parse several inputs, tagging them in one nlp.pipe() pass instead of one nlp() call each."""
+    texts = list(texts)
+    segments = [text.strip() for text in texts]
+    _PIPED_DOCS.update(zip(segments, get_nlp().pipe(segments, batch_size=SPACY_BATCH_SIZE)))
+    try:
+        return [parse_input(text) for text in texts]
+    finally:
+        _PIPED_DOCS.clear()
+
+
+def warm_up():
+    """Build the spaCy pipeline and exercise rapidfuzz once, so the first real parse pays neither."""
+    get_nlp()("list files")
+    process.extractOne("list files", ACTION_KEYWORD_PHRASES, scorer=fuzz.WRatio, processor=None)